@@ -1,28 +1,58 @@
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
 import logging
-import json
+import asyncio
+import queue
+import atexit
 import time
 import os
+import orjson
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 from app.models.user import UserProfile, ChatRequest, ChatResponse
-from app.services.openai_client import get_next_question
+from app.services.openai_client import get_next_question, close_async_client, AZURE_API_KEY, AZURE_ENDPOINT
 from app.services.chat import get_chat_service
+from app.services.embeddings import get_embeddings_service, is_initialized, get_kb_counts
 from app.services import validation
 
-# Configure structured logging
+class StructuredFormatter(logging.Formatter):
+    """Render dict log messages as JSON lines stamped with the record time"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        if isinstance(record.msg, dict):
+            return orjson.dumps({
+                "timestamp": datetime.fromtimestamp(record.created).isoformat(),
+                **record.msg
+            }).decode()
+        return super().format(record)
+
+class DeferredQueueHandler(QueueHandler):
+    """Enqueue records as-is so JSON serialization runs on the listener thread"""
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+# Configure structured logging: request handlers only enqueue records, a
+# background listener thread serializes and writes them
+_log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+_stream_handler = logging.StreamHandler()
+_stream_handler.setFormatter(StructuredFormatter('%(message)s'))
+_log_listener = QueueListener(_log_queue, _stream_handler, respect_handler_level=True)
 logging.basicConfig(
     level=logging.INFO,
-    format='%(message)s',
     handlers=[
-        logging.StreamHandler()
+        DeferredQueueHandler(_log_queue)
     ]
 )
+_log_listener.start()
+atexit.register(_log_listener.stop)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="HMO Chatbot Service", version="1.4")
+app = FastAPI(title="HMO Chatbot Service", version="1.4", default_response_class=ORJSONResponse)
 
 # Add CORS middleware to allow frontend connections
 app.add_middleware(
@@ -33,6 +63,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class RouteAwareGZipMiddleware:
+    """GZipMiddleware for every path except excluded_paths, which pass through uncompressed"""
+    
+    def __init__(self, app, excluded_paths: frozenset, minimum_size: int = 500):
+        self.app = app
+        self.gzip_app = GZipMiddleware(app, minimum_size=minimum_size)
+        self.excluded_paths = excluded_paths
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+        else:
+            await self.gzip_app(scope, receive, send)
+
+# Compress larger JSON bodies (debug responses carry retrieved_chunks). The SSE
+# route is excluded for every client: gzip would hold tokens back until its
+# buffer fills
+app.add_middleware(RouteAwareGZipMiddleware, excluded_paths=frozenset({"/chat/stream"}), minimum_size=1024)
+
+# Include retrieval scores in chat responses (read once at import)
+DEBUG_RETRIEVAL = os.getenv("DEBUG_RETRIEVAL", "false").lower() == "true"
+
 # Global monitoring variables
 startup_time = time.time()
 chat_requests_served = 0
@@ -48,15 +100,50 @@ class ChatRequestExtended(BaseModel):
     history: List[Dict[str, str]] = []
     language: str | None = None
 
+def _validation_error_response(endpoint: str, error: str, profile: UserProfile, start_time: float) -> Dict[str, str]:
+    """Log a profile validation failure and build the error response"""
+    log_entry = {"endpoint": endpoint, "status": "validation_error", "error": error}
+    if error == "invalid_hmo":
+        log_entry["hmo_provided"] = profile.hmo
+    elif error == "invalid_membership_tier":
+        log_entry["tier_provided"] = profile.membership_tier
+    log_entry["processing_time"] = time.time() - start_time
+    logger.warning(log_entry)
+    return {"status": "error", "message": validation.PROFILE_ERROR_MESSAGES[error]}
+
+def _check_chat_profile(endpoint: str, profile: UserProfile, start_time: float) -> Optional[Dict[str, str]]:
+    """Return an error response if the profile may not chat yet, otherwise None"""
+    # Check if user profile is confirmed. If not, allow chat when all
+    # required fields are present (backward-compatible behavior).
+    if not profile.confirmed:
+        if profile.is_complete():
+            # Soft-confirm the profile to prevent blocking valid users
+            profile.confirmed = True
+        else:
+            logger.warning({
+                "endpoint": endpoint,
+                "status": "registration_required",
+                "processing_time": time.time() - start_time
+            })
+            return {
+                "status": "registration_required", 
+                "message": "Please complete your registration first using /collect_user_info."
+            }
+    
+    # Validate user profile if provided
+    error = validation.find_profile_error(profile, check_identity=False)
+    if error:
+        return _validation_error_response(endpoint, error, profile, start_time)
+    return None
+
 @app.post("/collect_user_info")
 async def collect_user_info(req: UserInfoRequest):
     """Collect and validate user profile information"""
     start_time = time.time()
     
     # Log request (non-sensitive fields only)
-    logger.info(json.dumps({
+    logger.info({
         "endpoint": "/collect_user_info",
-        "timestamp": datetime.now().isoformat(),
         "message_length": len(req.message),
         "profile_fields_provided": {
             "first_name": bool(req.user_profile.first_name),
@@ -66,54 +153,12 @@ async def collect_user_info(req: UserInfoRequest):
             "membership_tier": req.user_profile.membership_tier or None,
             "confirmed": req.user_profile.confirmed
         }
-    }))
+    })
     
     # Validate known fields if present
-    if req.user_profile.id_number and not validation.validate_id_number(req.user_profile.id_number):
-        error_response = {"status": "error", "message": "מספר זהות לא תקין / Invalid ID number"}
-        logger.warning(json.dumps({
-            "endpoint": "/collect_user_info",
-            "timestamp": datetime.now().isoformat(),
-            "status": "validation_error",
-            "error": "invalid_id_number",
-            "processing_time": time.time() - start_time
-        }))
-        return error_response
-        
-    if req.user_profile.age and not validation.validate_age(req.user_profile.age):
-        error_response = {"status": "error", "message": "גיל לא תקין / Invalid age"}
-        logger.warning(json.dumps({
-            "endpoint": "/collect_user_info",
-            "timestamp": datetime.now().isoformat(),
-            "status": "validation_error",
-            "error": "invalid_age",
-            "processing_time": time.time() - start_time
-        }))
-        return error_response
-        
-    if req.user_profile.hmo and not validation.validate_hmo(req.user_profile.hmo):
-        error_response = {"status": "error", "message": "קופת חולים לא תקינה / Invalid HMO"}
-        logger.warning(json.dumps({
-            "endpoint": "/collect_user_info",
-            "timestamp": datetime.now().isoformat(),
-            "status": "validation_error",
-            "error": "invalid_hmo",
-            "hmo_provided": req.user_profile.hmo,
-            "processing_time": time.time() - start_time
-        }))
-        return error_response
-        
-    if req.user_profile.membership_tier and not validation.validate_membership_tier(req.user_profile.membership_tier):
-        error_response = {"status": "error", "message": "דרגת חברות לא תקינה / Invalid membership tier"}
-        logger.warning(json.dumps({
-            "endpoint": "/collect_user_info",
-            "timestamp": datetime.now().isoformat(),
-            "status": "validation_error", 
-            "error": "invalid_membership_tier",
-            "tier_provided": req.user_profile.membership_tier,
-            "processing_time": time.time() - start_time
-        }))
-        return error_response
+    error = validation.find_profile_error(req.user_profile)
+    if error:
+        return _validation_error_response("/collect_user_info", error, req.user_profile, start_time)
 
     try:
         # Get next question from OpenAI
@@ -125,28 +170,26 @@ async def collect_user_info(req: UserInfoRequest):
         response = {
             "status": "in_progress",
             "next_question": question,
-            "user_profile": req.user_profile.dict()
+            "user_profile": req.user_profile.model_dump()
         }
         
         # Log successful response
-        logger.info(json.dumps({
+        logger.info({
             "endpoint": "/collect_user_info",
-            "timestamp": datetime.now().isoformat(),
             "status": "success",
             "processing_time": time.time() - start_time,
             "question_generated": bool(question)
-        }))
+        })
         
         return response
         
     except Exception as e:
-        logger.error(json.dumps({
+        logger.error({
             "endpoint": "/collect_user_info",
-            "timestamp": datetime.now().isoformat(),
             "status": "error",
             "error": str(e),
             "processing_time": time.time() - start_time
-        }))
+        })
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 @app.post("/chat")
@@ -159,79 +202,26 @@ async def chat(req: ChatRequestExtended):
     start_time = time.time()
     
     # Log request (non-sensitive fields only)
-    logger.info(json.dumps({
+    logger.info({
         "endpoint": "/chat",
-        "timestamp": datetime.now().isoformat(),
         "message_length": len(req.message),
         "hmo": req.user_profile.hmo or None,
         "membership_tier": req.user_profile.membership_tier or None,
         "confirmed": req.user_profile.confirmed,
         "history_length": len(req.history),
         "request_count": chat_requests_served
-    }))
+    })
     
     try:
-        # Check if user profile is confirmed. If not, allow chat when all
-        # required fields are present (backward-compatible behavior).
-        if not req.user_profile.confirmed:
-            profile = req.user_profile
-            is_complete = all([
-                bool(getattr(profile, 'first_name', None)),
-                bool(getattr(profile, 'last_name', None)),
-                bool(getattr(profile, 'id_number', None)),
-                bool(getattr(profile, 'gender', None)),
-                getattr(profile, 'age', None) is not None,
-                bool(getattr(profile, 'hmo', None)),
-                bool(getattr(profile, 'hmo_card_number', None)),
-                bool(getattr(profile, 'membership_tier', None)),
-            ])
-
-            if is_complete:
-                # Soft-confirm the profile to prevent blocking valid users
-                req.user_profile.confirmed = True
-            else:
-                error_response = {
-                    "status": "registration_required", 
-                    "message": "Please complete your registration first using /collect_user_info."
-                }
-                logger.warning(json.dumps({
-                    "endpoint": "/chat",
-                    "timestamp": datetime.now().isoformat(),
-                    "status": "registration_required",
-                    "processing_time": time.time() - start_time
-                }))
-                return error_response
-        
-        # Validate user profile if provided
-        if req.user_profile.hmo and not validation.validate_hmo(req.user_profile.hmo):
-            error_response = {"status": "error", "message": "קופת חולים לא תקינה / Invalid HMO"}
-            logger.warning(json.dumps({
-                "endpoint": "/chat",
-                "timestamp": datetime.now().isoformat(),
-                "status": "validation_error",
-                "error": "invalid_hmo",
-                "hmo_provided": req.user_profile.hmo,
-                "processing_time": time.time() - start_time
-            }))
-            return error_response
-            
-        if req.user_profile.membership_tier and not validation.validate_membership_tier(req.user_profile.membership_tier):
-            error_response = {"status": "error", "message": "דרגת חברות לא תקינה / Invalid membership tier"}
-            logger.warning(json.dumps({
-                "endpoint": "/chat",
-                "timestamp": datetime.now().isoformat(),
-                "status": "validation_error",
-                "error": "invalid_membership_tier",
-                "tier_provided": req.user_profile.membership_tier,
-                "processing_time": time.time() - start_time
-            }))
+        error_response = _check_chat_profile("/chat", req.user_profile, start_time)
+        if error_response:
             return error_response
 
         # Get chat service
         chat_service = get_chat_service()
         
         # Generate answer
-        result = chat_service.generate_answer(
+        result = await chat_service.generate_answer(
             query=req.message,
             user_profile=req.user_profile,
             history=req.history,
@@ -250,14 +240,13 @@ async def chat(req: ChatRequestExtended):
                 },
                 "context_used": False
             }
-            logger.info(json.dumps({
+            logger.info({
                 "endpoint": "/chat",
-                "timestamp": datetime.now().isoformat(),
                 "status": "no_match",
                 "processing_time": time.time() - start_time,
                 "hmo": req.user_profile.hmo,
                 "membership_tier": req.user_profile.membership_tier
-            }))
+            })
             return no_match_response
         
         response = {
@@ -272,36 +261,86 @@ async def chat(req: ChatRequestExtended):
         }
         
         # Add debug retrieval info if enabled
-        debug_retrieval = os.getenv("DEBUG_RETRIEVAL", "false").lower() == "true"
-        if debug_retrieval:
+        if DEBUG_RETRIEVAL:
             response["retrieved_chunks"] = result.get("retrieved_chunks", [])
         
         # Log successful response
-        logger.info(json.dumps({
+        logger.info({
             "endpoint": "/chat",
-            "timestamp": datetime.now().isoformat(),
             "status": result["status"],
             "processing_time": time.time() - start_time,
             "sources": result["sources"],
             "hmo": req.user_profile.hmo,
             "membership_tier": req.user_profile.membership_tier,
             "context_used": result["context_used"]
-        }))
+        })
         
         return response
         
     except Exception as e:
-        logger.error(json.dumps({
+        logger.error({
             "endpoint": "/chat",
-            "timestamp": datetime.now().isoformat(),
             "status": "error",
             "error": str(e),
             "processing_time": time.time() - start_time,
             "hmo": req.user_profile.hmo,
             "membership_tier": req.user_profile.membership_tier
-        }))
+        })
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+@app.post("/chat/stream")
+async def chat_stream(req: ChatRequestExtended):
+    """
+    Streaming variant of /chat using Server-Sent Events.
+    Events: "sources" (citations, sent first), "token" (answer text deltas),
+    then "done", "no_match" or "error". Profile errors are returned as plain JSON.
+    """
+    global chat_requests_served
+    chat_requests_served += 1
+    start_time = time.time()
+    
+    logger.info({
+        "endpoint": "/chat/stream",
+        "message_length": len(req.message),
+        "hmo": req.user_profile.hmo or None,
+        "membership_tier": req.user_profile.membership_tier or None,
+        "confirmed": req.user_profile.confirmed,
+        "history_length": len(req.history),
+        "request_count": chat_requests_served
+    })
+    
+    try:
+        error_response = _check_chat_profile("/chat/stream", req.user_profile, start_time)
+        if error_response:
+            return error_response
+        
+        chat_service = get_chat_service()
+        events = chat_service.stream_answer(
+            query=req.message,
+            user_profile=req.user_profile,
+            history=req.history,
+            language=req.language,
+            include_retrieved_chunks=DEBUG_RETRIEVAL
+        )
+        
+    except Exception as e:
+        logger.error({
+            "endpoint": "/chat/stream",
+            "status": "error",
+            "error": str(e),
+            "processing_time": time.time() - start_time,
+            "hmo": req.user_profile.hmo,
+            "membership_tier": req.user_profile.membership_tier
+        })
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    
+    # Errors raised while streaming are reported as "error" events by stream_answer
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint with uptime, metrics, and system status"""
@@ -317,18 +356,14 @@ async def health_check():
     
     try:
         # Check OpenAI credentials
-        aoai_key = os.getenv("AOAI_API_KEY") or os.getenv("AZURE_OPENAI_API_KEY")
-        aoai_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-        if aoai_key and aoai_endpoint:
+        if AZURE_API_KEY and AZURE_ENDPOINT:
             checks["openai_credentials"] = True
         
-        # Check knowledge base and embeddings
-        from app.services.embeddings import get_embeddings_service
-        embeddings_service = get_embeddings_service()
-        if len(embeddings_service.chunks) > 0:
-            checks["knowledge_base"] = True
-        if len(embeddings_service.chunk_embeddings) > 0:
-            checks["embeddings"] = True
+        # Check knowledge base and embeddings (cached counts; never triggers a cold start)
+        if is_initialized():
+            chunk_count, embedding_count = get_kb_counts()
+            checks["knowledge_base"] = chunk_count > 0
+            checks["embeddings"] = embedding_count > 0
             
     except Exception as e:
         health_status = "degraded"
@@ -348,14 +383,13 @@ async def health_check():
     }
     
     # Log health check
-    logger.info(json.dumps({
+    logger.info({
         "endpoint": "/health",
-        "timestamp": datetime.now().isoformat(),
         "status": health_status,
         "uptime": uptime_seconds,
         "requests_served": chat_requests_served,
         "checks": checks
-    }))
+    })
     
     return response
 
@@ -363,15 +397,29 @@ async def health_check():
 async def knowledge_base_stats():
     """Get knowledge base statistics"""
     try:
-        from app.services.embeddings import get_embeddings_service
-        embeddings_service = get_embeddings_service()
+        embeddings_service = await get_embeddings_service()
         stats = embeddings_service.get_stats()
         return stats
     except Exception as e:
         return {"error": f"Could not load knowledge base stats: {str(e)}"}
 
-# Optional eager init: uncomment to pre-warm embeddings on startup
-# @app.on_event("startup")
-# async def startup_event():
-#     from app.services.embeddings import get_embeddings_service
-#     get_embeddings_service()
\ No newline at end of file
+async def _warm_up_knowledge_base():
+    """Load the knowledge base so the first real request doesn't pay the cold start"""
+    try:
+        await get_embeddings_service()
+    except Exception as e:
+        logger.error({
+            "event": "knowledge_base_warmup",
+            "status": "error",
+            "error": str(e)
+        })
+
+@app.on_event("startup")
+async def startup_event():
+    """Pre-warm embeddings in the background; /health reports degraded until ready"""
+    app.state.kb_warmup_task = asyncio.create_task(_warm_up_knowledge_base())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release the shared Azure OpenAI connection pool"""
+    await close_async_client()
\ No newline at end of file
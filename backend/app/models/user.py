@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List
 
 class UserInfoRequest(BaseModel):
@@ -10,6 +10,10 @@ class ChatRequest(BaseModel):
     history: List[dict] = []
 
 class UserProfile(BaseModel):
+    # Strip whitespace once at validation time. Not frozen: the registration flow
+    # fills fields in place, and extra keys from the frontend profile are ignored.
+    model_config = ConfigDict(str_strip_whitespace=True)
+
     first_name: Optional[str] = ""
     last_name: Optional[str] = ""
     id_number: Optional[str] = Field(default="", description="9-digit ID")
@@ -20,6 +24,14 @@ class UserProfile(BaseModel):
     membership_tier: Optional[str] = ""
     confirmed: bool = False  # To mark if user confirmed their details
 
+    def is_complete(self) -> bool:
+        """Check if all required fields are filled"""
+        return bool(
+            self.first_name and self.last_name and self.id_number and self.gender
+            and self.age is not None and self.hmo and self.hmo_card_number
+            and self.membership_tier
+        )
+
 class ChatResponse(BaseModel):
     status: str
     answer: str
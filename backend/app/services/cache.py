@@ -0,0 +1,86 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+import numpy as np
+
+class LRUCache:
+    """Exact-match cache that evicts the least recently used entry"""
+
+    def __init__(self, maxsize: int = 512):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value (and mark it recently used), or None"""
+        value = self._data.get(key)
+        if value is not None:
+            self._data.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the oldest entry when full"""
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+class SemanticCache:
+    """
+    LRU cache keyed by normalized embeddings.
+    A lookup hits when a stored embedding in the same scope has cosine
+    similarity >= threshold with the query embedding.
+    """
+
+    def __init__(self, maxsize: int = 256, threshold: float = 0.97):
+        self.maxsize = maxsize
+        self.threshold = threshold
+        # scope -> {embedding bytes -> (embedding, value)}
+        self._scopes: Dict[Hashable, "OrderedDict[bytes, Tuple[np.ndarray, Any]]"] = {}
+        # Global recency order across scopes, used for eviction
+        self._order: "OrderedDict[Tuple[Hashable, bytes], None]" = OrderedDict()
+
+    def get(self, scope: Hashable, embedding: np.ndarray) -> Optional[Any]:
+        """Return the value of the most similar cached embedding above threshold, or None"""
+        entries = self._scopes.get(scope)
+        if not entries:
+            return None
+
+        keys = list(entries.keys())
+        matrix = np.stack([entries[key][0] for key in keys], axis=0)
+        sims = matrix @ embedding
+        best = int(np.argmax(sims))
+        if sims[best] < self.threshold:
+            return None
+
+        key = keys[best]
+        entries.move_to_end(key)
+        self._order.move_to_end((scope, key))
+        return entries[key][1]
+
+    def put(self, scope: Hashable, embedding: np.ndarray, value: Any) -> None:
+        """Store a value under an embedding, evicting the oldest entry when full"""
+        key = embedding.tobytes()
+        entries = self._scopes.setdefault(scope, OrderedDict())
+        entries[key] = (embedding, value)
+        entries.move_to_end(key)
+        self._order[(scope, key)] = None
+        self._order.move_to_end((scope, key))
+
+        if len(self._order) > self.maxsize:
+            old_scope, old_key = self._order.popitem(last=False)[0]
+            old_entries = self._scopes[old_scope]
+            del old_entries[old_key]
+            if not old_entries:
+                del self._scopes[old_scope]
+
+    def clear(self) -> None:
+        self._scopes.clear()
+        self._order.clear()
+
+    def __len__(self) -> int:
+        return len(self._order)
@@ -1,101 +1,185 @@
-import os
-from typing import List, Dict, Any
-from openai import AzureOpenAI
+import asyncio
+import orjson
+from functools import cache, lru_cache
+from typing import AsyncIterator, List, Dict, Any, Tuple
 from dotenv import load_dotenv
 from ..models.user import UserProfile
-from .embeddings import get_embeddings_service
+from .embeddings import get_embeddings_service, CONTEXT_TOP_K
+from .openai_client import get_async_client, AZURE_DEPLOYMENT
+from .cache import LRUCache, SemanticCache
 
 load_dotenv()
 
+# Max concurrent in-flight completion calls (keeps us under Azure RPM limits)
+MAX_CONCURRENT_REQUESTS = 64
+
+# Query caches: L1 exact-match answers, L2 retrieval results for near-duplicate queries
+ANSWER_CACHE_SIZE = 512
+RETRIEVAL_CACHE_SIZE = 256
+SEMANTIC_HIT_THRESHOLD = 0.97
+
 class ChatService:
     def __init__(self):
         # Use same Azure OpenAI client as openai_client
-        self.client = AzureOpenAI(
-            api_key=os.getenv("AOAI_API_KEY"),
-            api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-15-preview"),
-            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT")
-        )
+        self.client = get_async_client()
         
-        self.deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT", "gpt-4o")
+        self.deployment = AZURE_DEPLOYMENT
+        self._semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        self._answer_cache = LRUCache(maxsize=ANSWER_CACHE_SIZE)
+        self._retrieval_cache = SemanticCache(maxsize=RETRIEVAL_CACHE_SIZE, threshold=SEMANTIC_HIT_THRESHOLD)
         
-    def generate_answer(self, 
+    async def generate_answer(self, 
                        query: str, 
                        user_profile: UserProfile, 
                        history: List[Dict] = None,
                        language: str | None = None) -> Dict[str, Any]:
         """Generate an answer using knowledge base and user context"""
         
-        # Get embeddings service
-        embeddings_service = get_embeddings_service()
+        history_context = _format_history(history)
         
-        # Retrieve relevant context
-        context, sources = embeddings_service.get_context_for_query(
-            query=query,
-            user_hmo=user_profile.hmo,
-            user_tier=user_profile.membership_tier,
-            max_context_length=2000
-        )
+        # L1: exact repeat of a question with the same prompt inputs -> reuse the answer
+        answer_key = _answer_key(query, user_profile, language, history_context)
+        cached_answer = self._answer_cache.get(answer_key)
+        if cached_answer is not None:
+            return dict(cached_answer)
         
-        # Also get top 3 matches with scores for transparency (does not affect prompt)
-        top_matches = embeddings_service.search_similar(
-            query=query,
-            user_hmo=user_profile.hmo,
-            user_tier=user_profile.membership_tier,
-            top_k=3
-        )
-        retrieved_chunks = []
-        for chunk, score in top_matches:
-            preview = (chunk.content or "").replace("\n", " ")[:120]
-            retrieved_chunks.append({
-                "score": float(score),
-                "content_preview": preview
-            })
-        
-        # Build conversation history context
-        history_context = ""
-        if history:
-            recent_history = history[-3:]  # Last 3 exchanges
-            history_parts = []
-            for exchange in recent_history:
-                if 'user' in exchange and 'assistant' in exchange:
-                    history_parts.append(f"משתמש: {exchange['user']}")
-                    history_parts.append(f"עוזר: {exchange['assistant']}")
-            history_context = "\n".join(history_parts)
+        context, sources, retrieved_chunks, embedding_ok = await self._retrieve(query, user_profile)
         
         # Create comprehensive prompt (respect requested language)
         prompt = self._build_chat_prompt(query, user_profile, context, history_context, language)
         
         try:
             # Generate response using Azure OpenAI
-            response = self.client.chat.completions.create(
-                model=self.deployment,
-                messages=[
-                    {"role": "system", "content": "You are a helpful healthcare assistant for Israeli HMOs. Answer strictly in the requested language."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=800
-            )
+            async with self._semaphore:
+                response = await self.client.chat.completions.create(
+                    model=self.deployment,
+                    messages=_completion_messages(prompt),
+                    temperature=0.7,
+                    max_tokens=800
+                )
             
             answer = response.choices[0].message.content
             
-            return {
+            result = {
                 "status": "answered",
                 "answer": answer,
                 "sources": sources,
                 "context_used": len(context) > 0,
                 "retrieved_chunks": retrieved_chunks
             }
+            if embedding_ok:
+                self._answer_cache.put(answer_key, result)
+            return dict(result)
             
         except Exception as e:
-            return {
-                "status": "error",
-                "answer": f"מצטער, אירעה שגיאה בעיבוד השאלה. / Sorry, an error occurred processing your question: {str(e)}",
-                "sources": [],
-                "context_used": False,
-                "retrieved_chunks": []
+            return _error_result(e)
+    
+    async def stream_answer(self,
+                      query: str,
+                      user_profile: UserProfile,
+                      history: List[Dict] = None,
+                      language: str | None = None,
+                      include_retrieved_chunks: bool = False) -> AsyncIterator[str]:
+        """
+        Stream an answer as Server-Sent Events.
+        Emits a "sources" event first, then "token" events as the model generates,
+        then "done". Emits "no_match" instead of tokens when retrieval finds nothing,
+        and "error" if anything fails after the stream has started.
+        """
+        history_context = _format_history(history)
+        
+        answer_key = _answer_key(query, user_profile, language, history_context)
+        cached_answer = self._answer_cache.get(answer_key)
+        if cached_answer is not None:
+            yield _sse_event("sources", _sources_payload(cached_answer, include_retrieved_chunks))
+            yield _sse_event("token", {"content": cached_answer["answer"]})
+            yield _sse_event("done", {"status": "answered"})
+            return
+        
+        try:
+            context, sources, retrieved_chunks, embedding_ok = await self._retrieve(query, user_profile)
+            result = {
+                "status": "answered",
+                "answer": "",
+                "sources": sources,
+                "context_used": len(context) > 0,
+                "retrieved_chunks": retrieved_chunks
             }
             
+            # Send citations before generation starts so the client can render them immediately
+            yield _sse_event("sources", _sources_payload(result, include_retrieved_chunks))
+            if not result["context_used"] and not sources:
+                yield _sse_event("no_match", {"status": "no_match"})
+                return
+            
+            prompt = self._build_chat_prompt(query, user_profile, context, history_context, language)
+            
+            answer_parts = []
+            async with self._semaphore:
+                stream = await self.client.chat.completions.create(
+                    model=self.deployment,
+                    messages=_completion_messages(prompt),
+                    temperature=0.7,
+                    max_tokens=800,
+                    stream=True
+                )
+                async for chunk in stream:
+                    # Azure sends content-filter chunks with no choices
+                    if not chunk.choices:
+                        continue
+                    token = chunk.choices[0].delta.content
+                    if token:
+                        answer_parts.append(token)
+                        yield _sse_event("token", {"content": token})
+            
+            result["answer"] = "".join(answer_parts)
+            if embedding_ok:
+                self._answer_cache.put(answer_key, result)
+            yield _sse_event("done", {"status": "answered"})
+            
+        except Exception as e:
+            yield _sse_event("error", _error_result(e))
+    
+    async def _retrieve(self, query: str, user_profile: UserProfile) -> Tuple[str, List[str], List[Dict[str, Any]], bool]:
+        """Retrieve prompt context, sources and top matches for a query"""
+        # Get embeddings service
+        embeddings_service = await get_embeddings_service()
+        
+        # Embed the query once and share it between the cache lookup and the search
+        query_embedding = await embeddings_service.embed_query(query)
+        embedding_ok = bool(query_embedding.any())
+        
+        # L2: semantically equivalent question for the same HMO/tier -> reuse retrieval
+        retrieval_scope = (user_profile.hmo or None, user_profile.membership_tier or None)
+        cached_retrieval = self._retrieval_cache.get(retrieval_scope, query_embedding) if embedding_ok else None
+        if cached_retrieval is not None:
+            context, sources, retrieved_chunks = cached_retrieval
+            return context, sources, retrieved_chunks, embedding_ok
+        
+        # One search serves both the prompt context and the top 3 matches
+        similar_chunks = await embeddings_service.search_similar(
+            query=query,
+            user_hmo=user_profile.hmo,
+            user_tier=user_profile.membership_tier,
+            top_k=CONTEXT_TOP_K,
+            query_embedding=query_embedding
+        )
+        context, sources = embeddings_service.build_context(similar_chunks, max_context_length=2000)
+        
+        # Top 3 matches with scores for transparency (does not affect prompt)
+        top_matches = similar_chunks[:3]
+        retrieved_chunks = []
+        for chunk, score in top_matches:
+            preview = (chunk.content or "").replace("\n", " ")[:120]
+            retrieved_chunks.append({
+                "score": float(score),
+                "content_preview": preview
+            })
+        
+        if embedding_ok:
+            self._retrieval_cache.put(retrieval_scope, query_embedding, (context, sources, retrieved_chunks))
+        return context, sources, retrieved_chunks, embedding_ok
+            
     def _build_chat_prompt(self, 
                           query: str, 
                           user_profile: UserProfile, 
@@ -104,29 +188,94 @@ class ChatService:
                           language: str | None = None) -> str:
         """Build comprehensive prompt for chat response"""
         
-        # User profile summary
-        profile_summary = f"""פרופיל משתמש:
-- שם: {user_profile.first_name} {user_profile.last_name}
-- קופת חולים: {user_profile.hmo or 'לא צוין'}
-- דרגת חברות: {user_profile.membership_tier or 'לא צוין'}
-- גיל: {user_profile.age or 'לא צוין'}"""
+        # Determine target language (anything unrecognized falls back to Hebrew)
+        lang = language.lower() if language else "he"
+        if lang not in _LANG_PROMPTS:
+            lang = "he"
+        template, no_context, no_history = _LANG_PROMPTS[lang]
+        
+        return template.format_map({
+            "profile_summary": _profile_summary(
+                user_profile.first_name, user_profile.last_name,
+                user_profile.hmo, user_profile.membership_tier,
+                user_profile.age, lang
+            ),
+            "context": context if context else no_context,
+            "history": history_context if history_context else no_history,
+            "query": query
+        })
+
+def _format_history(history: List[Dict] | None) -> str:
+    """Conversation history block of the chat prompt (last 3 exchanges)"""
+    if not history:
+        return ""
+    history_parts = []
+    for i in range(max(0, len(history) - 3), len(history)):
+        exchange = history[i]
+        if 'user' in exchange and 'assistant' in exchange:
+            history_parts.append(f"משתמש: {exchange['user']}")
+            history_parts.append(f"עוזר: {exchange['assistant']}")
+    return "\n".join(history_parts)
+
+def _answer_key(query: str, user_profile: UserProfile, language: str | None, history_context: str) -> Tuple:
+    """L1 cache key: everything that goes into the prompt"""
+    return (
+        " ".join(query.lower().split()),
+        user_profile.hmo, user_profile.membership_tier,
+        user_profile.first_name, user_profile.last_name, user_profile.age,
+        language, history_context
+    )
+
+def _completion_messages(prompt: str) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": "You are a helpful healthcare assistant for Israeli HMOs. Answer strictly in the requested language."},
+        {"role": "user", "content": prompt}
+    ]
 
-        # Determine target language
-        lang = (language or "he").lower()
-        if lang == "en":
-            prompt = f"""You are an AI assistant for Israeli health funds. Answer strictly in English.
+def _error_result(e: Exception) -> Dict[str, Any]:
+    return {
+        "status": "error",
+        "answer": f"מצטער, אירעה שגיאה בעיבוד השאלה. / Sorry, an error occurred processing your question: {str(e)}",
+        "sources": [],
+        "context_used": False,
+        "retrieved_chunks": []
+    }
 
-User profile:
-- Name: {user_profile.first_name} {user_profile.last_name}
-- HMO: {user_profile.hmo or 'Not specified'}
-- Membership tier: {user_profile.membership_tier or 'Not specified'}
-- Age: {user_profile.age or 'Not specified'}
+def _sources_payload(result: Dict[str, Any], include_retrieved_chunks: bool) -> Dict[str, Any]:
+    payload = {"sources": result["sources"], "context_used": result["context_used"]}
+    if include_retrieved_chunks:
+        payload["retrieved_chunks"] = result["retrieved_chunks"]
+    return payload
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Event with a JSON payload"""
+    return f"event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
+
+@lru_cache(maxsize=1024)
+def _profile_summary(first_name: str, last_name: str, hmo: str, tier: str, age: int | None, lang: str) -> str:
+    """User profile block of the chat prompt (only changes when the profile does)"""
+    if lang == "en":
+        return f"""User profile:
+- Name: {first_name} {last_name}
+- HMO: {hmo or 'Not specified'}
+- Membership tier: {tier or 'Not specified'}
+- Age: {age or 'Not specified'}"""
+    return f"""פרופיל משתמש:
+- שם: {first_name} {last_name}
+- קופת חולים: {hmo or 'לא צוין'}
+- דרגת חברות: {tier or 'לא צוין'}
+- גיל: {age or 'לא צוין'}"""
+
+# Chat prompt skeletons, filled with str.format_map
+_EN_TEMPLATE = """You are an AI assistant for Israeli health funds. Answer strictly in English.
+
+{profile_summary}
 
 Relevant knowledge:
-{context if context else 'No relevant information found in the knowledge base'}
+{context}
 
 Recent conversation history:
-{history_context if history_context else 'No previous history'}
+{history}
 
 User question:
 {query}
@@ -139,16 +288,18 @@ Instructions:
 5. Include phone numbers or links if available.
 
 Answer:"""
-        else:
-            prompt = f"""אתה עוזר AI מומחה לקופות החולים בישראל. ענה אך ורק בעברית.
+_EN_NO_CONTEXT = 'No relevant information found in the knowledge base'
+_EN_NO_HISTORY = 'No previous history'
+
+_HE_TEMPLATE = """אתה עוזר AI מומחה לקופות החולים בישראל. ענה אך ורק בעברית.
 
 {profile_summary}
 
 מידע רלוונטי מבסיס הידע:
-{context if context else 'לא נמצא מידע רלוונטי בבסיס הידע'}
+{context}
 
 היסטוריית שיחה אחרונה:
-{history_context if history_context else 'אין היסטוריית שיחה קודמת'}
+{history}
 
 שאלת המשתמש:
 {query}
@@ -161,15 +312,16 @@ Answer:"""
 5. כלול מספרי טלפון או קישורים אם זמינים.
 
 תשובה:"""
+_HE_NO_CONTEXT = 'לא נמצא מידע רלוונטי בבסיס הידע'
+_HE_NO_HISTORY = 'אין היסטוריית שיחה קודמת'
 
-        return prompt
-
-# Global instance
-chat_service = None
+# Language code -> (template, no-context text, no-history text)
+_LANG_PROMPTS = {
+    "he": (_HE_TEMPLATE, _HE_NO_CONTEXT, _HE_NO_HISTORY),
+    "en": (_EN_TEMPLATE, _EN_NO_CONTEXT, _EN_NO_HISTORY),
+}
 
+@cache
 def get_chat_service() -> ChatService:
     """Get or create global chat service instance"""
-    global chat_service
-    if chat_service is None:
-        chat_service = ChatService()
-    return chat_service
+    return ChatService()
@@ -1,40 +1,104 @@
 import os
+import asyncio
+import hashlib
 import numpy as np
 import logging
-import json
-from datetime import datetime
 from typing import List, Dict, Tuple, Optional
-from openai import AzureOpenAI
 from dotenv import load_dotenv
-from sklearn.metrics.pairwise import cosine_similarity
 from .knowledge_base import KnowledgeChunk, KnowledgeBaseService
+from .openai_client import get_async_client
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+# Max concurrent in-flight embedding calls (keeps us under Azure RPM limits)
+MAX_CONCURRENT_REQUESTS = 64
+# Inputs per embeddings call (Azure accepts up to 2048)
+EMBEDDING_BATCH_SIZE = 128
+EMBEDDING_DIM = 1536  # Ada-002 embedding size
+EMBEDDING_DEPLOYMENT = os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT", "text-embedding-ada-002")
+
+# Search results considered for the prompt context
+CONTEXT_TOP_K = 10
+
+# Words added by the "מקור: <service type>" context prefix (service types are 1-2 words)
+CONTEXT_PREFIX_WORDS = 3
+
+# On-disk embeddings cache, keyed by a hash of chunk content + deployment name
+EMBEDDINGS_CACHE_PATH = os.getenv(
+    "EMBEDDINGS_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "embeddings_cache.npz")
+)
+
+def _top_k_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """Indices of the top_k highest scores, best first (O(N) partition + O(k log k) sort)"""
+    n = scores.shape[0]
+    if top_k <= 0 or n == 0:
+        return np.empty(0, dtype=np.intp)
+    if top_k < n:
+        idx = np.argpartition(-scores, top_k - 1)[:top_k]
+    else:
+        idx = np.arange(n)
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
 class EmbeddingsService:
     def __init__(self):
-        # Azure OpenAI client for embeddings
-        self.client = AzureOpenAI(
-            api_key=os.getenv("AOAI_API_KEY") or os.getenv("AZURE_OPENAI_API_KEY"),
-            api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-15-preview"),
-            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT")
-        )
+        # Azure OpenAI client for embeddings (shared pool with chat completions)
+        self.client = get_async_client()
         # Embedding deployment name (Azure uses deployment name, not model id)
-        self.embedding_deployment = os.getenv(
-            "AZURE_OPENAI_EMBEDDING_DEPLOYMENT",
-            "text-embedding-ada-002"
-        )
+        self.embedding_deployment = EMBEDDING_DEPLOYMENT
+        self._semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
         
         # Storage for embeddings
         self.chunk_embeddings: Dict[str, np.ndarray] = {}
         self.chunks: List[KnowledgeChunk] = []
         
+        # Search index: L2-normalized float32 embeddings stacked row-wise, aligned with
+        # _index_chunks (float32 keeps the scan a single BLAS matrix-vector product)
+        self._emb_matrix: np.ndarray = np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+        self._index_chunks: List[KnowledgeChunk] = []
+        # Position of each index row in kb_service.chunks
+        self._index_positions: np.ndarray = np.zeros(0, dtype=np.intp)
+        # (hmo, tier) -> (submatrix, chunks) restricted to that user's chunks
+        self._filtered: Dict[Tuple[Optional[str], Optional[str]], Tuple[np.ndarray, List[KnowledgeChunk]]] = {}
+        
         # Knowledge base service
         self.kb_service = KnowledgeBaseService()
         
-    def initialize_knowledge_base(self) -> None:
+    async def initialize_knowledge_base(self) -> None:
         """Load knowledge base and generate embeddings"""
+        # Parsing, cache I/O and the index build are synchronous; run them in a worker
+        # thread so the event loop keeps serving requests (e.g. /health) meanwhile
+        missing_chunks, fingerprints = await asyncio.to_thread(self._load_chunks_and_cached_embeddings)
+        
+        # Generate missing embeddings, one request per batch, batches in parallel
+        batches = [
+            missing_chunks[i:i + EMBEDDING_BATCH_SIZE]
+            for i in range(0, len(missing_chunks), EMBEDDING_BATCH_SIZE)
+        ]
+        print(f"Processing {len(missing_chunks)} chunks in {len(batches)} batches")
+        
+        batch_embeddings = await asyncio.gather(*(
+            self._get_embeddings_batch([chunk.content for chunk in batch])
+            for batch in batches
+        ))
+        for batch, embeddings in zip(batches, batch_embeddings):
+            for chunk, embedding in zip(batch, embeddings):
+                self.chunk_embeddings[chunk.chunk_id] = embedding
+        
+        if missing_chunks:
+            await asyncio.to_thread(self._save_embeddings_cache, {
+                fingerprints[chunk_id]: embedding
+                for chunk_id, embedding in self.chunk_embeddings.items()
+                if embedding.any()  # Never persist zero-vector fallbacks
+            })
+        
+        await asyncio.to_thread(self._build_search_index)
+            
+        print("Knowledge base initialization complete!")
+        
+    def _load_chunks_and_cached_embeddings(self) -> Tuple[List[KnowledgeChunk], Dict[str, str]]:
+        """Load the knowledge base and its cached embeddings; returns (chunks to embed, fingerprints)"""
         print("Loading knowledge base...")
         self.kb_service.load_knowledge_base()
         self.chunks = self.kb_service.chunks
@@ -42,105 +106,200 @@ class EmbeddingsService:
         print(f"Loaded {len(self.chunks)} chunks")
         print("Generating embeddings...")
         
-        # Generate embeddings for all chunks
-        for i, chunk in enumerate(self.chunks):
-            if i % 10 == 0:
-                print(f"Processing chunk {i+1}/{len(self.chunks)}")
-                
-            embedding = self._get_embedding(chunk.content)
-            self.chunk_embeddings[chunk.chunk_id] = embedding
+        # Reuse cached embeddings; only chunks whose content changed get re-embedded
+        cache = self._load_embeddings_cache()
+        fingerprints = {chunk.chunk_id: self._fingerprint(chunk.content) for chunk in self.chunks}
+        missing_chunks = []
+        for chunk in self.chunks:
+            cached = cache.get(fingerprints[chunk.chunk_id])
+            if cached is not None:
+                self.chunk_embeddings[chunk.chunk_id] = cached
+            else:
+                missing_chunks.append(chunk)
+        print(f"Loaded {len(self.chunks) - len(missing_chunks)} embeddings from cache")
+        return missing_chunks, fingerprints
+        
+    def _build_search_index(self) -> None:
+        """Stack chunk embeddings into a single L2-normalized matrix"""
+        positions = [i for i, chunk in enumerate(self.chunks) if chunk.chunk_id in self.chunk_embeddings]
+        self._index_positions = np.asarray(positions, dtype=np.intp)
+        self._index_chunks = [self.chunks[i] for i in positions]
+        self._filtered = {}
+        
+        if not self._index_chunks:
+            self._emb_matrix = np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+            return
             
-        print("Knowledge base initialization complete!")
+        matrix = np.stack(
+            [self.chunk_embeddings[chunk.chunk_id] for chunk in self._index_chunks], axis=0
+        ).astype(np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0  # Keep zero-vector fallbacks at zero instead of NaN
+        matrix /= norms
+        self._emb_matrix = matrix
+        
+        # Precompute a contiguous submatrix for every (hmo, tier) combination
+        hmos = {None} | {hmo for chunk in self._index_chunks for hmo in chunk.hmos}
+        tiers = {None} | {tier for chunk in self._index_chunks for tier in chunk.tiers}
+        for hmo in hmos:
+            for tier in tiers:
+                self._get_filtered_index(hmo, tier)
+        
+    def _get_filtered_index(self, user_hmo: str = None, user_tier: str = None) -> Tuple[np.ndarray, List[KnowledgeChunk]]:
+        """Search index rows relevant to a user's HMO/tier (built once per combination)"""
+        key = (user_hmo or None, user_tier or None)
+        entry = self._filtered.get(key)
+        if entry is None:
+            user_mask = self.kb_service.get_user_mask(key[0], key[1])
+            rows = np.flatnonzero(user_mask[self._index_positions])
+            entry = (
+                np.ascontiguousarray(self._emb_matrix[rows]),
+                [self._index_chunks[i] for i in rows]
+            )
+            self._filtered[key] = entry
+        return entry
         
-    def _get_embedding(self, text: str) -> np.ndarray:
+    def _fingerprint(self, content: str) -> str:
+        """Cache key for a chunk's embedding"""
+        return hashlib.sha256((content + self.embedding_deployment).encode("utf-8")).hexdigest()
+        
+    def _load_embeddings_cache(self) -> Dict[str, np.ndarray]:
+        """Load cached embeddings from disk (empty if missing or unreadable)"""
+        if not os.path.exists(EMBEDDINGS_CACHE_PATH):
+            return {}
+        try:
+            with np.load(EMBEDDINGS_CACHE_PATH, allow_pickle=False) as data:
+                return {key: data[key].astype(np.float32, copy=False) for key in data.files}
+        except Exception as e:
+            print(f"Error loading embeddings cache: {e}")
+            return {}
+            
+    def _save_embeddings_cache(self, entries: Dict[str, np.ndarray]) -> None:
+        """Atomically write embeddings cache to disk"""
+        tmp_path = f"{EMBEDDINGS_CACHE_PATH}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                np.savez(f, **entries)
+            os.replace(tmp_path, EMBEDDINGS_CACHE_PATH)
+        except Exception as e:
+            print(f"Error saving embeddings cache: {e}")
+        
+    async def _get_embedding(self, text: str) -> np.ndarray:
         """Get embedding for a text using Azure OpenAI"""
         try:
             # Use Azure deployment name from env
-            response = self.client.embeddings.create(
-                input=text,
-                model=self.embedding_deployment
-            )
+            async with self._semaphore:
+                response = await self.client.embeddings.create(
+                    input=text,
+                    model=self.embedding_deployment
+                )
             
-            embedding = np.array(response.data[0].embedding)
+            embedding = np.asarray(response.data[0].embedding, dtype=np.float32)
             return embedding
             
         except Exception as e:
             print(f"Error getting embedding: {e}")
             # Return zero vector as fallback
-            return np.zeros(1536)  # Ada-002 embedding size
+            return np.zeros(EMBEDDING_DIM, dtype=np.float32)
+            
+    async def _get_embeddings_batch(self, texts: List[str]) -> List[np.ndarray]:
+        """Get embeddings for a batch of texts with a single Azure OpenAI call"""
+        try:
+            async with self._semaphore:
+                response = await self.client.embeddings.create(
+                    input=texts,
+                    model=self.embedding_deployment
+                )
+            
+            # Keep results aligned with the input order
+            data = sorted(response.data, key=lambda d: d.index)
+            return [np.asarray(d.embedding, dtype=np.float32) for d in data]
             
-    def search_similar(self, query: str, user_hmo: str = None, user_tier: str = None, top_k: int = 5) -> List[Tuple[KnowledgeChunk, float]]:
+        except Exception as e:
+            print(f"Error getting embeddings batch: {e}")
+            # Return zero vectors as fallback
+            return [np.zeros(EMBEDDING_DIM, dtype=np.float32) for _ in texts]
+            
+    async def embed_query(self, query: str) -> np.ndarray:
+        """Get the L2-normalized embedding of a query (dot product == cosine similarity)"""
+        query_embedding = (await self._get_embedding(query)).astype(np.float32)
+        query_norm = np.linalg.norm(query_embedding)
+        if query_norm > 0:
+            query_embedding /= query_norm
+        return query_embedding
+        
+    async def search_similar(self, query: str, user_hmo: str = None, user_tier: str = None, top_k: int = 5,
+                             query_embedding: Optional[np.ndarray] = None) -> List[Tuple[KnowledgeChunk, float]]:
         """Search for similar chunks based on query and user profile"""
         
-        # Get query embedding
-        query_embedding = self._get_embedding(query)
+        # Get query embedding unless the caller already has one from embed_query()
+        if query_embedding is None:
+            query_embedding = await self.embed_query(query)
         
-        # Filter chunks based on user profile
-        relevant_chunks = self.kb_service.get_chunks_for_user(user_hmo, user_tier)
+        # Only chunks relevant to the user profile, precomputed per (hmo, tier)
+        emb_matrix, candidates = self._get_filtered_index(user_hmo, user_tier)
         
-        # Calculate similarities
-        similarities = []
+        # Cosine similarity against every candidate in one matrix-vector product.
+        # An exact scan is deliberate: the KB is ~7.2k chunks (fewer per profile), a
+        # single BLAS pass of about 2 ms. An IVF index with nlist = 4*sqrt(N) (~340
+        # lists) would want ~13k training points (39 per list), more than N.
+        sims = emb_matrix @ query_embedding
         
-        for chunk in relevant_chunks:
-            if chunk.chunk_id in self.chunk_embeddings:
-                chunk_embedding = self.chunk_embeddings[chunk.chunk_id]
-                
-                # Calculate cosine similarity
-                similarity = cosine_similarity(
-                    query_embedding.reshape(1, -1),
-                    chunk_embedding.reshape(1, -1)
-                )[0][0]
-                
-                similarities.append((chunk, similarity))
-                
-        # Sort by similarity and return top k
-        similarities.sort(key=lambda x: x[1], reverse=True)
-        top_results = similarities[:top_k]
+        # Select and order the top k without sorting every candidate
+        order = _top_k_indices(sims, top_k)
+        top_results = [(candidates[i], float(sims[i])) for i in order]
         
         # Log top 3 matches for debugging/verification using structured logging
-        matches_log = []
-        for i, (chunk, score) in enumerate(top_results[:3]):
-            content_preview = chunk.content.replace('\n', ' ')[:60] + "..."
-            matches_log.append({
-                "rank": i + 1,
-                "score": round(score, 3),
-                "content_preview": content_preview,
-                "service_type": chunk.service_type,
-                "source_file": chunk.source_file
+        if logger.isEnabledFor(logging.DEBUG):
+            matches_log = []
+            for i, (chunk, score) in enumerate(top_results[:3]):
+                content_preview = chunk.content.replace('\n', ' ')[:60] + "..."
+                matches_log.append({
+                    "rank": i + 1,
+                    "score": round(score, 3),
+                    "content_preview": content_preview,
+                    "service_type": chunk.service_type,
+                    "source_file": chunk.source_file
+                })
+            
+            logger.debug({
+                "operation": "similarity_search",
+                "query": query,
+                "filter": {
+                    "hmo": user_hmo or "any",
+                    "tier": user_tier or "any"
+                },
+                "total_chunks_searched": len(candidates),
+                "top_matches": matches_log
             })
         
-        logger.debug(json.dumps({
-            "operation": "similarity_search",
-            "timestamp": datetime.now().isoformat(),
-            "query": query,
-            "filter": {
-                "hmo": user_hmo or "any",
-                "tier": user_tier or "any"
-            },
-            "total_chunks_searched": len(relevant_chunks),
-            "top_matches": matches_log
-        }))
-        
         return top_results
         
-    def get_context_for_query(self, query: str, user_hmo: str = None, user_tier: str = None, max_context_length: int = 2000) -> Tuple[str, List[str]]:
+    async def get_context_for_query(self, query: str, user_hmo: str = None, user_tier: str = None, max_context_length: int = 2000,
+                                    query_embedding: Optional[np.ndarray] = None) -> Tuple[str, List[str]]:
         """Get relevant context for a query, respecting token limits"""
         
         # Search for relevant chunks
-        similar_chunks = self.search_similar(query, user_hmo, user_tier, top_k=10)
+        similar_chunks = await self.search_similar(query, user_hmo, user_tier, top_k=CONTEXT_TOP_K,
+                                                   query_embedding=query_embedding)
+        return self.build_context(similar_chunks, max_context_length)
         
+    def build_context(self, similar_chunks: List[Tuple[KnowledgeChunk, float]],
+                      max_context_length: int = 2000) -> Tuple[str, List[str]]:
+        """Build the prompt context and sources from ranked search results, respecting token limits"""
         # Build context string within token limit
         context_parts = []
         sources = []
+        seen_sources = set()
         current_length = 0
         
         for chunk, similarity in similar_chunks:
-            chunk_text = f"מקור: {chunk.service_type}\n{chunk.content}\n"
-            chunk_length = len(chunk_text.split())  # Rough token estimation
+            chunk_length = chunk.word_count + CONTEXT_PREFIX_WORDS  # Rough token estimation
             
             if current_length + chunk_length <= max_context_length:
-                context_parts.append(chunk_text)
-                if chunk.source_file not in sources:
+                context_parts.append(f"מקור: {chunk.service_type}\n{chunk.content}\n")
+                if chunk.source_file not in seen_sources:
+                    seen_sources.add(chunk.source_file)
                     sources.append(chunk.source_file)
                 current_length += chunk_length
             else:
@@ -159,18 +318,35 @@ class EmbeddingsService:
         
 # Global instance
 embeddings_service = None
+_init_lock = asyncio.Lock()
+# (chunks, embeddings) of the initialized service, readable without touching it
+_kb_counts: Tuple[int, int] = (0, 0)
 
-def get_embeddings_service() -> EmbeddingsService:
+async def get_embeddings_service() -> EmbeddingsService:
     """Get or create global embeddings service instance"""
-    global embeddings_service
+    global embeddings_service, _kb_counts
     if embeddings_service is None:
-        embeddings_service = EmbeddingsService()
-        embeddings_service.initialize_knowledge_base()
+        # Only publish the instance once it is fully initialized so concurrent
+        # callers never see a half-loaded knowledge base
+        async with _init_lock:
+            if embeddings_service is None:
+                service = EmbeddingsService()
+                await service.initialize_knowledge_base()
+                _kb_counts = (len(service.chunks), len(service.chunk_embeddings))
+                embeddings_service = service
     return embeddings_service
 
+def is_initialized() -> bool:
+    """Check whether the knowledge base is loaded, without triggering initialization"""
+    return embeddings_service is not None
+
+def get_kb_counts() -> Tuple[int, int]:
+    """Get (chunks, embeddings) counts cached at initialization time"""
+    return _kb_counts
+
 # Allow running as a module for quick verification
 if __name__ == "__main__":
-    svc = get_embeddings_service()
+    svc = asyncio.run(get_embeddings_service())
     stats = svc.get_stats()
     print({
         "chunks": stats.get("total_chunks", 0),
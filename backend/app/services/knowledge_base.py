@@ -1,9 +1,78 @@
 import os
-import re
-from typing import List, Dict, Tuple
-from bs4 import BeautifulSoup
-from dataclasses import dataclass
+import glob
+import hashlib
+import pickle
+import mmap
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Iterator, List, Dict, Sequence, Tuple
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import lxml.html
+from dataclasses import dataclass, field
+import numpy as np
 import tiktoken
+from .cache import LRUCache
+
+# Table columns after the service name, in order
+HMO_NAMES = ("מכבי", "מאוחדת", "כללית")
+TIER_NAMES = ("זהב", "כסף", "ארד")
+
+KB_HTML_FILES = [
+    "alternative_services.html",
+    "communication_clinic_services.html", 
+    "dentel_services.html",
+    "optometry_services.html",
+    "pragrency_services.html",
+    "workshops_services.html"
+]
+
+# Bump when parsing logic or KnowledgeChunk changes to invalidate on-disk caches
+KB_CACHE_VERSION = 3
+
+TOKENIZER_ENCODING = "cl100k_base"  # GPT-4 encoding
+
+# libxml2 HTML parser building lxml.html elements (files are UTF-8 without a charset meta)
+LXML_PARSER = lxml.html.HTMLParser(encoding="utf-8")
+
+def _membership_masks(values_per_chunk: Sequence[Tuple[str, ...]]) -> Dict[str, np.ndarray]:
+    """value -> boolean mask over the chunks whose tuple contains it"""
+    masks: Dict[str, np.ndarray] = {}
+    for i, values in enumerate(values_per_chunk):
+        for value in values:
+            mask = masks.get(value)
+            if mask is None:
+                mask = masks[value] = np.zeros(len(values_per_chunk), dtype=bool)
+            mask[i] = True
+    return masks
+
+@lru_cache(maxsize=None)
+def _get_encoding(name: str) -> tiktoken.Encoding:
+    """Shared tiktoken encoder (building one loads the BPE merge tables)"""
+    return tiktoken.get_encoding(name)
+
+@lru_cache(maxsize=1024)
+def _chunk_text(text: str, max_tokens: int, encoding_name: str) -> Tuple[str, ...]:
+    """Token-window split of a text, memoized for repeated inputs"""
+    encoding = _get_encoding(encoding_name)
+    tokens = encoding.encode_ordinary(text)
+    chunks = []
+    
+    for i in range(0, len(tokens), max_tokens):
+        chunk_tokens = tokens[i:i + max_tokens]
+        chunks.append(encoding.decode(chunk_tokens))
+        
+    return tuple(chunks)
+
+@contextmanager
+def _mapped_file(file_path: str) -> Iterator[mmap.mmap | bytes]:
+    """Read-only memory map of a file (empty files cannot be mapped, so yield b"")"""
+    with open(file_path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield mm
 
 @dataclass
 class KnowledgeChunk:
@@ -14,6 +83,10 @@ class KnowledgeChunk:
     chunk_id: str
     hmos: List[str]  # Which HMOs this content applies to
     tiers: List[str]  # Which membership tiers this applies to
+    word_count: int = field(init=False, repr=False)  # Rough token estimate, computed once
+
+    def __post_init__(self):
+        self.word_count = len(self.content.split())
 
 class KnowledgeBaseService:
     def __init__(self, data_directory: str = None):
@@ -23,42 +96,111 @@ class KnowledgeBaseService:
             data_directory = os.path.join(current_dir, "phase2_data")
         self.data_directory = data_directory
         self.chunks: List[KnowledgeChunk] = []
-        self.encoding = tiktoken.get_encoding("cl100k_base")  # GPT-4 encoding
+        # Column views of self.chunks (parallel lists) for full scans
+        self._service_types: List[str] = []
+        self._hmos: List[Tuple[str, ...]] = []
+        self._tiers: List[Tuple[str, ...]] = []
+        # HMO / tier -> boolean mask over self.chunks
+        self._hmo_masks: Dict[str, np.ndarray] = {}
+        self._tier_masks: Dict[str, np.ndarray] = {}
+        # (hmo, tier) -> filtered chunk list; the domain is a handful of combinations
+        self._user_chunks_cache = LRUCache(maxsize=32)
+        self._loaded = False
+        self.encoding = _get_encoding(TOKENIZER_ENCODING)
         
     def load_knowledge_base(self) -> None:
-        """Load and parse all HTML files in the knowledge base"""
-        html_files = [
-            "alternative_services.html",
-            "communication_clinic_services.html", 
-            "dentel_services.html",
-            "optometry_services.html",
-            "pragrency_services.html",
-            "workshops_services.html"
-        ]
+        """Load and parse all HTML files in the knowledge base (once; later calls are no-ops)"""
+        if self._loaded:
+            return
+        
+        # Warm start: reuse the chunks parsed from identical HTML files
+        cache_path = os.path.join(self.data_directory, f".kb_cache_{self._content_hash()}.pkl")
+        cached_chunks = self._load_cache(cache_path)
+        if cached_chunks is not None:
+            self.chunks = cached_chunks
+        else:
+            # Files are independent; parse them concurrently and merge in file order
+            file_pairs = [
+                (os.path.join(self.data_directory, file_name), file_name)
+                for file_name in KB_HTML_FILES
+                if os.path.exists(os.path.join(self.data_directory, file_name))
+            ]
+            if file_pairs:
+                with ThreadPoolExecutor(max_workers=len(file_pairs)) as executor:
+                    futures = [executor.submit(self._parse_html_file, path, name) for path, name in file_pairs]
+                    for future in futures:
+                        self.chunks.extend(future.result())
+            
+            if self.chunks:
+                self._save_cache(cache_path)
+        
+        self._build_indexes()
+        self._loaded = True
+    
+    def _build_indexes(self) -> None:
+        """Build column views of the chunks and HMO/tier membership masks"""
+        self._service_types = [chunk.service_type for chunk in self.chunks]
+        self._hmos = [tuple(chunk.hmos) for chunk in self.chunks]
+        self._tiers = [tuple(chunk.tiers) for chunk in self.chunks]
         
-        for file_name in html_files:
+        self._hmo_masks = _membership_masks(self._hmos)
+        self._tier_masks = _membership_masks(self._tiers)
+        self._user_chunks_cache.clear()
+    
+    def _content_hash(self) -> str:
+        """Hash of the knowledge base HTML files (and cache version)"""
+        digest = hashlib.blake2b(str(KB_CACHE_VERSION).encode(), digest_size=16)
+        for file_name in KB_HTML_FILES:
             file_path = os.path.join(self.data_directory, file_name)
             if os.path.exists(file_path):
-                self._parse_html_file(file_path, file_name)
-                
-    def _parse_html_file(self, file_path: str, file_name: str) -> None:
-        """Parse a single HTML file and extract content chunks"""
+                digest.update(file_name.encode())
+                with _mapped_file(file_path) as mm:
+                    digest.update(mm)
+        return digest.hexdigest()
+    
+    def _load_cache(self, cache_path: str) -> List[KnowledgeChunk] | None:
+        """Load pickled chunks, or None if missing/unreadable"""
+        if not os.path.exists(cache_path):
+            return None
+        try:
+            with open(cache_path, 'rb') as file:
+                return pickle.load(file)
+        except Exception as e:
+            print(f"Error loading knowledge base cache: {e}")
+            return None
+    
+    def _save_cache(self, cache_path: str) -> None:
+        """Atomically write parsed chunks to disk, replacing caches of older content"""
+        tmp_path = f"{cache_path}.tmp"
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                html_content = file.read()
+            with open(tmp_path, 'wb') as file:
+                pickle.dump(self.chunks, file, protocol=5)
+            os.replace(tmp_path, cache_path)
+            for stale_path in glob.glob(os.path.join(self.data_directory, ".kb_cache_*.pkl")):
+                if stale_path != cache_path:
+                    os.remove(stale_path)
+        except Exception as e:
+            print(f"Error saving knowledge base cache: {e}")
                 
-            soup = BeautifulSoup(html_content, 'html.parser')
+    def _parse_html_file(self, file_path: str, file_name: str) -> List[KnowledgeChunk]:
+        """Parse a single HTML file and return its content chunks"""
+        chunks: List[KnowledgeChunk] = []
+        try:
+            # One full lxml.html tree serves all section parsers (the contact parser
+            # relies on the original sibling structure)
+            html_root = lxml.html.parse(file_path, LXML_PARSER).getroot()
             
             # Extract service type from filename
             service_type = self._extract_service_type(file_name)
             
             # Parse different sections
-            self._parse_header_content(soup, file_name, service_type)
-            self._parse_table_content(soup, file_name, service_type)
-            self._parse_contact_info(soup, file_name, service_type)
+            chunks += self._parse_header_content(html_root, file_name, service_type)
+            chunks += self._parse_table_content(html_root, file_name, service_type)
+            chunks += self._parse_contact_info(html_root, file_name, service_type)
             
         except Exception as e:
             print(f"Error parsing {file_name}: {e}")
+        return chunks
             
     def _extract_service_type(self, file_name: str) -> str:
         """Extract service type from filename"""
@@ -72,31 +214,31 @@ class KnowledgeBaseService:
         }
         return service_mapping.get(file_name, "שירותים כלליים")
         
-    def _parse_header_content(self, soup: BeautifulSoup, file_name: str, service_type: str) -> None:
+    def _parse_header_content(self, html_root: lxml.html.HtmlElement, file_name: str, service_type: str) -> List[KnowledgeChunk]:
         """Parse header content (title, description, service lists)"""
         # Get main title
-        title = soup.find('h2')
-        if title:
-            title_text = title.get_text().strip()
+        title = html_root.find('.//h2')
+        if title is not None:
+            title_text = title.text_content().strip()
             
         # Get description paragraphs
-        paragraphs = soup.find_all('p')
+        paragraphs = html_root.iter('p')
         description_parts = []
         
         for p in paragraphs:
-            text = p.get_text().strip()
+            text = p.text_content().strip()
             if text and not text.startswith('הטבלה'):
                 description_parts.append(text)
                 
         # Get service lists
-        service_lists = soup.find_all('ul')
+        service_lists = html_root.iter('ul')
         for ul in service_lists:
-            if ul.find_parent('table'):  # Skip lists inside tables
+            if next(ul.iterancestors('table'), None) is not None:  # Skip lists inside tables
                 continue
                 
             services = []
-            for li in ul.find_all('li'):
-                service_text = li.get_text().strip()
+            for li in ul.iter('li'):
+                service_text = li.text_content().strip()
                 if service_text:
                     services.append(service_text)
                     
@@ -106,64 +248,67 @@ class KnowledgeBaseService:
         
         # Combine all header content
         if description_parts:
-            header_content = f"{service_type}\n\n" + "\n\n".join(description_parts)
+            header_content = "\n\n".join([service_type, *description_parts])
             
             chunk = KnowledgeChunk(
                 content=header_content,
                 source_file=file_name,
                 service_type=service_type,
                 chunk_id=f"{file_name}_header",
-                hmos=["מכבי", "מאוחדת", "כללית"],
-                tiers=["זהב", "כסף", "ארד"]
+                hmos=list(HMO_NAMES),
+                tiers=list(TIER_NAMES)
             )
-            self.chunks.append(chunk)
+            return [chunk]
+        return []
             
-    def _parse_table_content(self, soup: BeautifulSoup, file_name: str, service_type: str) -> None:
+    def _parse_table_content(self, html_root: lxml.html.HtmlElement, file_name: str, service_type: str) -> List[KnowledgeChunk]:
         """Parse table content and create chunks for each service"""
-        table = soup.find('table')
-        if not table:
-            return
+        if html_root is None:
+            return []
+        tables = html_root.xpath('//table')
+        if not tables:
+            return []
             
-        # Get table headers
-        headers = []
-        header_row = table.find('tr')
-        if header_row:
-            for th in header_row.find_all(['th', 'td']):
-                headers.append(th.get_text().strip())
-                
         # Process each service row
-        rows = table.find_all('tr')[1:]  # Skip header row
+        rows = tables[0].xpath('.//tr')[1:]  # Skip header row
+        
+        table_chunks = []
+        add_chunk = table_chunks.append
+        id_prefix = file_name + "_"
         
         for i, row in enumerate(rows):
-            cells = row.find_all(['td', 'th'])
+            cells = [cell.text_content().strip() for cell in row.xpath('.//td|.//th')]
             if len(cells) < 4:  # Should have service name + 3 HMOs
                 continue
                 
-            service_name = cells[0].get_text().strip()
+            service_name = cells[0]
             
-            # Create chunks for each HMO
-            hmo_names = ["מכבי", "מאוחדת", "כללית"]
+            # Parts shared by the row's three HMO chunks
+            content_prefix = "".join((service_type, " - ", service_name, "\n\nקופת חולים: "))
+            row_id_prefix = "".join((id_prefix, service_name, "_"))
+            row_id_suffix = f"_{i}"
             
-            for j, hmo_name in enumerate(hmo_names):
+            # Create chunks for each HMO
+            for j, hmo_name in enumerate(HMO_NAMES):
                 if j + 1 < len(cells):
-                    hmo_details = cells[j + 1].get_text().strip()
+                    hmo_details = cells[j + 1]
                     
                     # Extract tier information
                     tier_info = self._extract_tier_info(hmo_details)
                     
-                    chunk_content = f"{service_type} - {service_name}\n\n"
-                    chunk_content += f"קופת חולים: {hmo_name}\n\n"
-                    chunk_content += hmo_details
+                    chunk_content = "".join((content_prefix, hmo_name, "\n\n", hmo_details))
                     
                     chunk = KnowledgeChunk(
                         content=chunk_content,
                         source_file=file_name,
                         service_type=service_type,
-                        chunk_id=f"{file_name}_{service_name}_{hmo_name}_{i}",
+                        chunk_id=row_id_prefix + hmo_name + row_id_suffix,
                         hmos=[hmo_name],
                         tiers=tier_info
                     )
-                    self.chunks.append(chunk)
+                    add_chunk(chunk)
+        
+        return table_chunks
                     
     def _extract_tier_info(self, hmo_details: str) -> List[str]:
         """Extract which membership tiers are mentioned in the details"""
@@ -174,100 +319,91 @@ class KnowledgeBaseService:
             tiers.append("כסף")
         if "ארד" in hmo_details:
             tiers.append("ארד")
-        return tiers if tiers else ["זהב", "כסף", "ארד"]
+        return tiers if tiers else list(TIER_NAMES)
         
-    def _parse_contact_info(self, soup: BeautifulSoup, file_name: str, service_type: str) -> None:
+    def _parse_contact_info(self, html_root: lxml.html.HtmlElement, file_name: str, service_type: str) -> List[KnowledgeChunk]:
         """Parse contact information sections"""
         # Find contact sections
         contact_sections = []
         
         # Look for h3 headers that indicate contact info
-        h3_tags = soup.find_all('h3')
+        h3_tags = html_root.iter('h3')
         for h3 in h3_tags:
-            if any(keyword in h3.get_text() for keyword in ['טלפון', 'פרטים', 'מידע']):
+            h3_text = h3.text_content()
+            if any(keyword in h3_text for keyword in ['טלפון', 'פרטים', 'מידע']):
                 # Get the following ul element
-                next_ul = h3.find_next_sibling('ul')
-                if next_ul:
+                next_ul = next(h3.itersiblings('ul'), None)
+                if next_ul is not None:
                     contact_info = []
-                    for li in next_ul.find_all('li'):
-                        contact_text = li.get_text().strip()
+                    for li in next_ul.iter('li'):
+                        contact_text = li.text_content().strip()
                         contact_info.append(contact_text)
                     
                     if contact_info:
-                        section_title = h3.get_text().strip()
-                        section_content = f"{section_title}\n\n" + "\n".join(contact_info)
+                        section_title = h3_text.strip()
+                        section_content = "".join((section_title, "\n\n", "\n".join(contact_info)))
                         contact_sections.append(section_content)
         
         # Create contact info chunk
         if contact_sections:
-            contact_content = f"{service_type} - מידע ליצירת קשר\n\n" + "\n\n".join(contact_sections)
+            contact_content = "\n\n".join([f"{service_type} - מידע ליצירת קשר", *contact_sections])
             
             chunk = KnowledgeChunk(
                 content=contact_content,
                 source_file=file_name,
                 service_type=service_type,
                 chunk_id=f"{file_name}_contact",
-                hmos=["מכבי", "מאוחדת", "כללית"],
-                tiers=["זהב", "כסף", "ארד"]
+                hmos=list(HMO_NAMES),
+                tiers=list(TIER_NAMES)
             )
-            self.chunks.append(chunk)
+            return [chunk]
+        return []
             
     def chunk_text(self, text: str, max_tokens: int = 400) -> List[str]:
         """Split text into chunks of max_tokens size"""
-        tokens = self.encoding.encode(text)
-        chunks = []
-        
-        for i in range(0, len(tokens), max_tokens):
-            chunk_tokens = tokens[i:i + max_tokens]
-            chunk_text = self.encoding.decode(chunk_tokens)
-            chunks.append(chunk_text)
-            
-        return chunks
-        
+        return list(_chunk_text(text, max_tokens, TOKENIZER_ENCODING))
+    
     def get_chunks_for_user(self, user_hmo: str = None, user_tier: str = None) -> List[KnowledgeChunk]:
-        """Filter chunks relevant to a specific user"""
+        """Filter chunks relevant to a specific user (the returned list is shared; do not mutate)"""
+        self.load_knowledge_base()
         if not user_hmo and not user_tier:
             return self.chunks
+        
+        key = (user_hmo or None, user_tier or None)
+        cached = self._user_chunks_cache.get(key)
+        if cached is not None:
+            return cached
             
-        filtered_chunks = []
-        for chunk in self.chunks:
-            # Check HMO match
-            hmo_match = not user_hmo or user_hmo in chunk.hmos
-            
-            # Check tier match  
-            tier_match = not user_tier or user_tier in chunk.tiers
-            
-            if hmo_match and tier_match:
-                filtered_chunks.append(chunk)
-                
+        # flatnonzero keeps knowledge base order
+        filtered_chunks = [self.chunks[i] for i in np.flatnonzero(self.get_user_mask(user_hmo, user_tier))]
+        self._user_chunks_cache.put(key, filtered_chunks)
         return filtered_chunks
         
+    def get_user_mask(self, user_hmo: str = None, user_tier: str = None) -> np.ndarray:
+        """Boolean mask over self.chunks of the chunks relevant to a specific user"""
+        self.load_knowledge_base()
+        mask = np.ones(len(self.chunks), dtype=bool)
+        if user_hmo:
+            hmo_mask = self._hmo_masks.get(user_hmo)
+            mask = mask & hmo_mask if hmo_mask is not None else np.zeros_like(mask)
+        if user_tier:
+            tier_mask = self._tier_masks.get(user_tier)
+            mask = mask & tier_mask if tier_mask is not None else np.zeros_like(mask)
+        return mask
+        
     def get_chunk_count(self) -> int:
         """Get total number of chunks"""
+        self.load_knowledge_base()
         return len(self.chunks)
         
     def get_summary(self) -> Dict[str, int]:
         """Get summary statistics of the knowledge base"""
-        summary = {
+        self.load_knowledge_base()
+        hmo_counts = Counter(hmo for hmos in self._hmos for hmo in hmos)
+        tier_counts = Counter(tier for tiers in self._tiers for tier in tiers)
+        return {
             "total_chunks": len(self.chunks),
-            "by_service": {},
-            "by_hmo": {"מכבי": 0, "מאוחדת": 0, "כללית": 0},
-            "by_tier": {"זהב": 0, "כסף": 0, "ארד": 0}
-        }
-        
-        for chunk in self.chunks:
-            # Count by service type
-            service = chunk.service_type
-            summary["by_service"][service] = summary["by_service"].get(service, 0) + 1
-            
-            # Count by HMO
-            for hmo in chunk.hmos:
-                if hmo in summary["by_hmo"]:
-                    summary["by_hmo"][hmo] += 1
-                    
-            # Count by tier
-            for tier in chunk.tiers:
-                if tier in summary["by_tier"]:
-                    summary["by_tier"][tier] += 1
-                    
-        return summary
+            "by_service": dict(Counter(self._service_types)),
+            "by_hmo": {hmo: hmo_counts[hmo] for hmo in HMO_NAMES},
+            "by_tier": {tier: tier_counts[tier] for tier in TIER_NAMES}
+        }
\ No newline at end of file
@@ -1,6 +1,9 @@
 import os
+import re
+import httpx
+from typing import Optional
 from dotenv import load_dotenv
-from openai import AzureOpenAI
+from openai import AzureOpenAI, AsyncAzureOpenAI
 from ..models.user import UserProfile
 from . import validation
 
@@ -13,7 +16,7 @@ USE_MOCK = os.getenv("USE_MOCK", "true").lower() == "true"
 USE_EXTRACTION = os.getenv("USE_EXTRACTION", "false").lower() == "true"
 
 # Azure OpenAI credentials
-AZURE_API_KEY = os.getenv("AOAI_API_KEY")
+AZURE_API_KEY = os.getenv("AOAI_API_KEY") or os.getenv("AZURE_OPENAI_API_KEY")
 AZURE_ENDPOINT = os.getenv("AZURE_OPENAI_ENDPOINT")
 AZURE_DEPLOYMENT = os.getenv("AZURE_OPENAI_DEPLOYMENT", "gpt-4o")
 AZURE_API_VERSION = os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-15-preview")
@@ -27,6 +30,103 @@ if not USE_MOCK:
         azure_endpoint=AZURE_ENDPOINT
     )
 
+# Connection pool shared by all async Azure OpenAI traffic (chat + embeddings)
+HTTP_LIMITS = httpx.Limits(max_connections=256, max_keepalive_connections=128)
+HTTP_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+
+_async_http_client: Optional[httpx.AsyncClient] = None
+_async_client: Optional[AsyncAzureOpenAI] = None
+
+
+def get_async_client() -> AsyncAzureOpenAI:
+    """Get the process-wide async Azure OpenAI client (HTTP/2, pooled connections)"""
+    global _async_http_client, _async_client
+    if _async_client is None:
+        _async_http_client = httpx.AsyncClient(
+            limits=HTTP_LIMITS,
+            timeout=HTTP_TIMEOUT,
+            http2=True
+        )
+        _async_client = AsyncAzureOpenAI(
+            api_key=AZURE_API_KEY,
+            api_version=AZURE_API_VERSION,
+            azure_endpoint=AZURE_ENDPOINT,
+            http_client=_async_http_client
+        )
+    return _async_client
+
+
+async def close_async_client() -> None:
+    """Close the shared HTTP connection pool"""
+    global _async_http_client, _async_client
+    if _async_http_client is not None:
+        await _async_http_client.aclose()
+    _async_http_client = None
+    _async_client = None
+
+
+# Initial greetings/registration messages (not assigned to any field)
+_GREETINGS = frozenset({
+    "hi, i want to register", "hello", "שלום, אני רוצה להירשם",
+    "start", "begin", "התחל", "שלום", "hi"
+})
+
+# Confirmation responses
+_CONFIRM_YES = frozenset({"yes", "כן", "y", "אישור"})
+_CONFIRM_NO = frozenset({"no", "לא", "n"})
+
+# Bare numeric answers (ID / HMO card, age)
+_NINE_DIGITS = re.compile(r'\A\d{9}\Z').match
+_AGE_DIGITS = re.compile(r'\A\d{1,3}\Z').match
+
+# Registration answer aliases -> canonical profile values
+_GENDER_MAP = {
+    'male': 'Male', 'זכר': 'Male', 'm': 'Male',
+    'female': 'Female', 'נקבה': 'Female', 'f': 'Female',
+}
+_HMO_MAP = {
+    'מכבי': 'מכבי', 'maccabi': 'מכבי',
+    'כללית': 'כללית', 'clalit': 'כללית',
+    'מאוחדת': 'מאוחדת', 'meuhedet': 'מאוחדת',
+    'לאומית': 'לאומית', 'leumit': 'לאומית',
+}
+_TIER_MAP = {
+    'זהב': 'זהב', 'gold': 'זהב',
+    'כסף': 'כסף', 'silver': 'כסף',
+    'ארד': 'ארד', 'bronze': 'ארד',
+}
+
+# Registration fields that must be non-empty before confirmation (besides age)
+_REQUIRED_TEXT_FIELDS = (
+    'first_name', 'last_name', 'id_number', 'gender',
+    'hmo', 'hmo_card_number', 'membership_tier',
+)
+
+# Confirmation summaries, filled from the profile's fields
+_GENDER_HE = {"Male": "זכר", "Female": "נקבה"}
+_SUMMARY_HE = """סיכום:
+שם פרטי: {first_name}
+שם משפחה: {last_name}
+תעודת זהות: {id_number}
+מין: {gender}
+גיל: {age}
+קופת חולים: {hmo}
+כרטיס קופה: {hmo_card_number}
+דרגה: {membership_tier}
+
+האם כל המידע נכון? (כן/לא)"""
+_SUMMARY_EN = """Summary:
+First Name: {first_name}
+Last Name: {last_name}
+ID: {id_number}
+Gender: {gender}
+Age: {age}
+HMO: {hmo}
+HMO Card: {hmo_card_number}
+Tier: {membership_tier}
+
+Is all the information correct and confirmed?"""
+
 
 def get_next_question(user_profile, user_message: str, language: str = "he") -> str:
     """
@@ -39,21 +139,11 @@ def get_next_question(user_profile, user_message: str, language: str = "he") ->
 
     # ALWAYS use deterministic sequence for proper flow control
     # Handle simple field assignment based on current missing field
-    # Skip initial greetings/registration messages
-    greeting_patterns = [
-        "hi, i want to register", "hello", "שלום, אני רוצה להירשם", 
-        "start", "begin", "התחל", "שלום", "hi"
-    ]
-    
-    # Handle confirmation responses
-    confirmation_yes = ["yes", "כן", "y", "אישור"]
-    confirmation_no = ["no", "לא", "n"]
-    
     if user_message and user_message.strip():
         message_lower = user_message.strip().lower()
         
         # Skip processing if it's an initial greeting/registration message
-        if message_lower in greeting_patterns:
+        if message_lower in _GREETINGS:
             pass  # Don't assign to any field
         else:
             # Determine which field we're currently collecting based on what's missing
@@ -61,61 +151,43 @@ def get_next_question(user_profile, user_message: str, language: str = "he") ->
                 user_profile.first_name = user_message.strip()
             elif not user_profile.last_name:
                 user_profile.last_name = user_message.strip()
-            elif not user_profile.id_number and user_message.isdigit() and len(user_message) == 9:
+            elif not user_profile.id_number and _NINE_DIGITS(user_message):
                 user_profile.id_number = user_message.strip()
-            elif not user_profile.gender and user_message.lower() in ['male', 'female', 'זכר', 'נקבה', 'm', 'f']:
-                if user_message.lower() in ['male', 'זכר', 'm']:
-                    user_profile.gender = 'Male'
-                elif user_message.lower() in ['female', 'נקבה', 'f']:
-                    user_profile.gender = 'Female'
-            elif not user_profile.age and user_message.isdigit():
+            elif not user_profile.gender and user_message.lower() in _GENDER_MAP:
+                user_profile.gender = _GENDER_MAP[user_message.lower()]
+            elif not user_profile.age and _AGE_DIGITS(user_message):
                 age = int(user_message)
                 if 0 <= age <= 120:
                     user_profile.age = age
             elif not user_profile.hmo:
                 # Handle both Hebrew and English HMO names
-                message_lower = user_message.lower().strip()
-                if message_lower in ['מכבי', 'maccabi']:
-                    user_profile.hmo = 'מכבי'
-                elif message_lower in ['כללית', 'clalit']:
-                    user_profile.hmo = 'כללית'
-                elif message_lower in ['מאוחדת', 'meuhedet']:
-                    user_profile.hmo = 'מאוחדת'
-                elif message_lower in ['לאומית', 'leumit']:
-                    user_profile.hmo = 'לאומית'
-            elif not user_profile.hmo_card_number and user_message.isdigit() and len(user_message) == 9:
+                hmo = _HMO_MAP.get(message_lower)
+                if hmo:
+                    user_profile.hmo = hmo
+            elif not user_profile.hmo_card_number and _NINE_DIGITS(user_message):
                 user_profile.hmo_card_number = user_message.strip()
             elif not user_profile.membership_tier:
                 # Handle both Hebrew and English membership tiers
-                message_lower = user_message.lower().strip()
-                if message_lower in ['זהב', 'gold']:
-                    user_profile.membership_tier = 'זהב'
-                elif message_lower in ['כסף', 'silver']:
-                    user_profile.membership_tier = 'כסף'
-                elif message_lower in ['ארד', 'bronze']:
-                    user_profile.membership_tier = 'ארד'
+                tier = _TIER_MAP.get(message_lower)
+                if tier:
+                    user_profile.membership_tier = tier
 
     # If all required fields are present but not yet confirmed, handle confirmation flow first
-    required_filled = all([
-        bool(getattr(user_profile, 'first_name', None)),
-        bool(getattr(user_profile, 'last_name', None)),
-        bool(getattr(user_profile, 'id_number', None)),
-        bool(getattr(user_profile, 'gender', None)),
-        getattr(user_profile, 'age', None) is not None,
-        bool(getattr(user_profile, 'hmo', None)),
-        bool(getattr(user_profile, 'hmo_card_number', None)),
-        bool(getattr(user_profile, 'membership_tier', None)),
-    ])
+    # (age only needs to be set; 0 counts as filled)
+    required_filled = (
+        getattr(user_profile, 'age', None) is not None
+        and all(getattr(user_profile, field, None) for field in _REQUIRED_TEXT_FIELDS)
+    )
 
     if required_filled and not getattr(user_profile, 'confirmed', False):
-        if user_message and user_message.strip().lower() in confirmation_yes:
+        if user_message and user_message.strip().lower() in _CONFIRM_YES:
             user_profile.confirmed = True
             return (
                 "הרישום הושלם! ניתן לעבור לשאלות רפואיות."
                 if user_prefers_hebrew else
                 "Registration complete! You can proceed to Medical Q&A."
             )
-        if user_message and user_message.strip().lower() in confirmation_no:
+        if user_message and user_message.strip().lower() in _CONFIRM_NO:
             return (
                 "איזה שדה תרצה לתקן? (שם פרטי, שם משפחה, תעודת זהות, מין, גיל, קופה, כרטיס קופה, דרגה)"
                 if user_prefers_hebrew else
@@ -175,32 +247,9 @@ def get_next_question(user_profile, user_message: str, language: str = "he") ->
     # All fields completed - show confirmation
     if user_prefers_hebrew:
         # Map gender to Hebrew for display
-        gender_display = user_profile.gender
-        if user_profile.gender == "Male":
-            gender_display = "זכר"
-        elif user_profile.gender == "Female":
-            gender_display = "נקבה"
-        
-        return f"""סיכום:
-שם פרטי: {user_profile.first_name}
-שם משפחה: {user_profile.last_name}
-תעודת זהות: {user_profile.id_number}
-מין: {gender_display}
-גיל: {user_profile.age}
-קופת חולים: {user_profile.hmo}
-כרטיס קופה: {user_profile.hmo_card_number}
-דרגה: {user_profile.membership_tier}
-
-האם כל המידע נכון? (כן/לא)"""
+        return _SUMMARY_HE.format_map({
+            **vars(user_profile),
+            "gender": _GENDER_HE.get(user_profile.gender, user_profile.gender)
+        })
     else:
-        return f"""Summary:
-First Name: {user_profile.first_name}
-Last Name: {user_profile.last_name}
-ID: {user_profile.id_number}
-Gender: {user_profile.gender}
-Age: {user_profile.age}
-HMO: {user_profile.hmo}
-HMO Card: {user_profile.hmo_card_number}
-Tier: {user_profile.membership_tier}
-
-Is all the information correct and confirmed?"""
+        return _SUMMARY_EN.format_map(vars(user_profile))
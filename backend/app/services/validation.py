@@ -1,11 +1,49 @@
 import re
 from typing import Dict, Any, List, Optional
 
-VALID_HMOS = {"מכבי", "מאוחדת", "כללית"}
-VALID_TIERS = {"זהב", "כסף", "ארד"}
+VALID_HMOS = frozenset({"מכבי", "מאוחדת", "כללית"})
+VALID_TIERS = frozenset({"זהב", "כסף", "ארד"})
+
+_ID_RE = re.compile(r"\d{9}")
+
+# Keyword alternations for one-pass detection. Groups are listed in priority
+# order (Hebrew before English) and map to canonical values by group index.
+_HMO_RE = re.compile(r"(מכבי)|(מאוחדת)|(כללית)|(maccabi)|(meuhedet)|(clalit)")
+_HMO_VALUES = ("מכבי", "מאוחדת", "כללית", "מכבי", "מאוחדת", "כללית")
+_TIER_RE = re.compile(r"(זהב)|(כסף)|(ארד)|(gold)|(silver)|(bronze)")
+_TIER_VALUES = ("זהב", "כסף", "ארד", "זהב", "כסף", "ארד")
+_GENDER_RE = re.compile(r"(female|נקבה)|(male|זכר)")
+_GENDER_VALUES = ("Female", "Male")
+
+# Free-text extraction patterns (matched against the lowercased message unless noted)
+_AGE_PATTERNS = [re.compile(p) for p in (
+    r"\b(?:i\s*am|i'm|age|גיל)\s*(\d{1,3})\b",
+    r"\bאני\s*(\d{1,3})\b",
+    r"\b(\d{1,3})\s*years?\s*old\b",
+    r"\bגיל\s*(\d{1,3})\b",
+)]
+_NAME_PATTERNS = [re.compile(p) for p in (
+    r"\bmy name is\s+([A-Za-zא-ת'-]+)\s+([A-Za-zא-ת'-]+)\b",
+    r"\bi am\s+([A-Za-zא-ת'-]+)\s+([A-Za-zא-ת'-]+)\b",
+    r"\bשמי\s+([א-ת'-]+)\s+([א-ת'-]+)\b",
+    r"\bקוראים לי\s+([א-ת'-]+)\s+([א-ת'-]+)\b",
+)]
+# Whole tokens (runs of word chars, Hebrew, '-') made only of 2-20 Latin/Hebrew letters or '-'
+_NAME_WORDS = re.compile(r'(?<![\w\u0590-\u05FF-])[A-Za-zא-ת-]{2,20}(?![\w\u0590-\u05FF-])').findall
+_ID_CONTEXT = re.compile(r"(?:id|ת\.?ז\.?|מספר\s*זהות)[^\d]{0,8}(\d{9})")
+_CARD_CONTEXT = re.compile(r"(?:card|כרטיס)[^\d]{0,8}(\d{9})")
+_NINES = re.compile(r"\b(\d{9})\b")  # Matched against the original message
+
+# Profile validation error code -> user-facing message
+PROFILE_ERROR_MESSAGES = {
+    "invalid_id_number": "מספר זהות לא תקין / Invalid ID number",
+    "invalid_age": "גיל לא תקין / Invalid age",
+    "invalid_hmo": "קופת חולים לא תקינה / Invalid HMO",
+    "invalid_membership_tier": "דרגת חברות לא תקינה / Invalid membership tier",
+}
 
 def validate_id_number(id_number: str) -> bool:
-    return bool(re.fullmatch(r"\d{9}", id_number))
+    return _ID_RE.fullmatch(id_number) is not None
 
 def validate_age(age: int) -> bool:
     return 0 <= age <= 120
@@ -16,36 +54,54 @@ def validate_hmo(hmo: str) -> bool:
 def validate_membership_tier(tier: str) -> bool:
     return tier in VALID_TIERS
 
+def find_profile_error(profile, check_identity: bool = True) -> Optional[str]:
+    """
+    Return the error code of the first invalid field in a user profile, or None.
+    Empty fields are skipped; ID and age are only checked when check_identity is set.
+    """
+    if check_identity:
+        if profile.id_number and _ID_RE.fullmatch(profile.id_number) is None:
+            return "invalid_id_number"
+        if profile.age and not 0 <= profile.age <= 120:
+            return "invalid_age"
+    if profile.hmo and profile.hmo not in VALID_HMOS:
+        return "invalid_hmo"
+    if profile.membership_tier and profile.membership_tier not in VALID_TIERS:
+        return "invalid_membership_tier"
+    return None
+
+def _match_keyword(pattern: re.Pattern, values: tuple, text: str) -> Optional[str]:
+    """Canonical value of the highest-priority keyword group found in text"""
+    best = None
+    for m in pattern.finditer(text):
+        if best is None or m.lastindex < best:
+            best = m.lastindex
+            if best == 1:
+                break
+    return values[best - 1] if best else None
+
+# (field, validator) pairs applied by validate_user_info, in output order
+_FIELD_VALIDATORS = (
+    ("hmo", validate_hmo),
+    ("membership_tier", validate_membership_tier),
+    ("age", lambda age: isinstance(age, int) and validate_age(age)),
+    ("id_number", validate_id_number),
+    ("hmo_card_number", validate_id_number),
+)
+_PASSTHROUGH_FIELDS = ("first_name", "last_name", "gender")
+
 def validate_user_info(user_info: Dict[str, Any]) -> Dict[str, Any]:
     """
     Validate and normalize user information
     """
-    validated_info = {}
-    
-    # Validate HMO
-    if "hmo" in user_info and validate_hmo(user_info["hmo"]):
-        validated_info["hmo"] = user_info["hmo"]
-    
-    # Validate membership tier
-    if "membership_tier" in user_info and validate_membership_tier(user_info["membership_tier"]):
-        validated_info["membership_tier"] = user_info["membership_tier"]
-    
-    # Validate age
-    if "age" in user_info and isinstance(user_info["age"], int) and validate_age(user_info["age"]):
-        validated_info["age"] = user_info["age"]
-    
-    # Validate ID number
-    if "id_number" in user_info and validate_id_number(user_info["id_number"]):
-        validated_info["id_number"] = user_info["id_number"]
-    
-    # Validate HMO card number
-    if "hmo_card_number" in user_info and validate_id_number(user_info["hmo_card_number"]):
-        validated_info["hmo_card_number"] = user_info["hmo_card_number"]
+    validated_info = {
+        field: value
+        for field, validator in _FIELD_VALIDATORS
+        if (value := user_info.get(field)) is not None and validator(value)
+    }
     
     # Pass through other fields without validation for now
-    for field in ["first_name", "last_name", "gender"]:
-        if field in user_info and user_info[field]:
-            validated_info[field] = user_info[field]
+    validated_info.update({field: user_info[field] for field in _PASSTHROUGH_FIELDS if user_info.get(field)})
     
     return validated_info
 
@@ -64,53 +120,22 @@ def extract_user_info_from_message(message: str, user_profile: Optional[Any] = N
     text = message.strip()
     text_lower = text.lower()
 
-    # --- HMO (Hebrew + English mapping) ---
-    if "מכבי" in text:
-        proposed["hmo"] = "מכבי"
-    elif "מאוחדת" in text:
-        proposed["hmo"] = "מאוחדת"
-    elif "כללית" in text:
-        proposed["hmo"] = "כללית"
-    else:
-        # English to Hebrew mapping
-        if "maccabi" in text_lower:
-            proposed["hmo"] = "מכבי"
-        elif "meuhedet" in text_lower:
-            proposed["hmo"] = "מאוחדת"
-        elif "clalit" in text_lower:
-            proposed["hmo"] = "כללית"
-
-    # --- Membership tier (Hebrew + English mapping) ---
-    if "זהב" in text:
-        proposed["membership_tier"] = "זהב"
-    elif "כסף" in text:
-        proposed["membership_tier"] = "כסף"
-    elif "ארד" in text:
-        proposed["membership_tier"] = "ארד"
-    else:
-        if "gold" in text_lower:
-            proposed["membership_tier"] = "זהב"
-        elif "silver" in text_lower:
-            proposed["membership_tier"] = "כסף"
-        elif "bronze" in text_lower:
-            proposed["membership_tier"] = "ארד"
-
-    # --- Gender (Hebrew + English) ---
-    if any(word in text_lower for word in ["female", "נקבה"]):
-        proposed["gender"] = "Female"
-    elif any(word in text_lower for word in ["male", "זכר"]):
-        proposed["gender"] = "Male"
+    # --- HMO, membership tier, gender (Hebrew + English, one scan each) ---
+    # Hebrew has no case, so the lowercased text serves both languages
+    hmo = _match_keyword(_HMO_RE, _HMO_VALUES, text_lower)
+    if hmo:
+        proposed["hmo"] = hmo
+    tier = _match_keyword(_TIER_RE, _TIER_VALUES, text_lower)
+    if tier:
+        proposed["membership_tier"] = tier
+    gender = _match_keyword(_GENDER_RE, _GENDER_VALUES, text_lower)
+    if gender:
+        proposed["gender"] = gender
 
     # --- Age (heuristics to avoid matching IDs) ---
-    age_patterns = [
-        r"\b(?:i\s*am|i'm|age|גיל)\s*(\d{1,3})\b",
-        r"\bאני\s*(\d{1,3})\b",
-        r"\b(\d{1,3})\s*years?\s*old\b",
-        r"\bגיל\s*(\d{1,3})\b",
-    ]
     age_value: Optional[int] = None
-    for pat in age_patterns:
-        m = re.search(pat, text_lower)
+    for pat in _AGE_PATTERNS:
+        m = pat.search(text_lower)
         if m:
             try:
                 age_candidate = int(m.group(1))
@@ -124,14 +149,8 @@ def extract_user_info_from_message(message: str, user_profile: Optional[Any] = N
 
     # --- Names (English + Hebrew common phrases) ---
     # English: "my name is Sarah Levi" | "I am Sarah Levi"
-    name_patterns = [
-        r"\bmy name is\s+([A-Za-zא-ת'-]+)\s+([A-Za-zא-ת'-]+)\b",
-        r"\bi am\s+([A-Za-zא-ת'-]+)\s+([A-Za-zא-ת'-]+)\b",
-        r"\bשמי\s+([א-ת'-]+)\s+([א-ת'-]+)\b",
-        r"\bקוראים לי\s+([א-ת'-]+)\s+([א-ת'-]+)\b",
-    ]
-    for pat in name_patterns:
-        m = re.search(pat, text_lower)
+    for pat in _NAME_PATTERNS:
+        m = pat.search(text_lower)
         if m:
             first_name = m.group(1).strip().title()
             last_name = m.group(2).strip().title()
@@ -142,11 +161,8 @@ def extract_user_info_from_message(message: str, user_profile: Optional[Any] = N
     # If no structured pattern found, try simple name extraction
     # This handles cases like "דוד כהן" or "John Smith" but respects the collection order
     if "first_name" not in proposed and "last_name" not in proposed:
-        # Remove numbers and special chars, split by whitespace
-        clean_text = re.sub(r'[^\w\s\u0590-\u05FF-]', ' ', text).strip()
-        words = clean_text.split()
-        # Filter out words that are clearly not names (numbers, very short/long words)
-        name_words = [w for w in words if re.match(r'^[A-Za-zא-ת-]{2,20}$', w)]
+        # Words that could be names (no numbers, not very short/long), in one scan
+        name_words = _NAME_WORDS(text)
         
         if len(name_words) >= 1:
             # Check current profile state
@@ -164,8 +180,8 @@ def extract_user_info_from_message(message: str, user_profile: Optional[Any] = N
 
     # --- ID and HMO card numbers (prefer context; else assign first/second 9-digit) ---
     # Contextual matches
-    id_context = re.search(r"(?:id|ת\.?ז\.?|מספר\s*זהות)[^\d]{0,8}(\d{9})", text_lower)
-    card_context = re.search(r"(?:card|כרטיס)[^\d]{0,8}(\d{9})", text_lower)
+    id_context = _ID_CONTEXT.search(text_lower)
+    card_context = _CARD_CONTEXT.search(text_lower)
     if id_context:
         proposed["id_number"] = id_context.group(1)
     if card_context:
@@ -173,7 +189,7 @@ def extract_user_info_from_message(message: str, user_profile: Optional[Any] = N
 
     # Fallback: assign first/second 9-digit sequences
     if "id_number" not in proposed or "hmo_card_number" not in proposed:
-        all_nines = re.findall(r"\b(\d{9})\b", text)
+        all_nines = _NINES.findall(text)
         # Assign in order if still missing
         idx = 0
         if "id_number" not in proposed and idx < len(all_nines):
@@ -1,19 +1,31 @@
 import sys
 import os
+import asyncio
+from functools import lru_cache
 sys.path.append(os.path.dirname(__file__))
 
-from app.services.knowledge_base import KnowledgeBaseService
+from app.services.knowledge_base import KnowledgeBaseService, KB_HTML_FILES
 from app.services.embeddings import EmbeddingsService
+from app.services.openai_client import close_async_client
+
+# Chunks the original html.parser implementation produced from phase2_data
+# (7,212 in total: one header chunk per file, the rest table rows and contact info)
+EXPECTED_HEADER_CHUNKS = 6
+EXPECTED_TABLE_AND_CONTACT_CHUNKS = 7206
+
+@lru_cache(maxsize=1)
+def _get_kb_service() -> KnowledgeBaseService:
+    """Knowledge base parsed once per run and shared by the KB and embeddings tests"""
+    kb_service = KnowledgeBaseService()
+    kb_service.load_knowledge_base()
+    return kb_service
 
 def test_knowledge_base():
     print("Testing Knowledge Base Service...")
     
-    # Initialize service
-    kb_service = KnowledgeBaseService()
-    
     # Load knowledge base
     try:
-        kb_service.load_knowledge_base()
+        kb_service = _get_kb_service()
         print(f"✅ Successfully loaded {len(kb_service.chunks)} chunks")
         
         # Show summary
@@ -51,28 +63,73 @@ def test_knowledge_base():
         traceback.print_exc()
         return False
 
-def test_embeddings_search(query):
-    print(f"\n🔍 Testing Embeddings Search for: '{query}'")
-    print("="*60)
+def test_chunk_counts():
+    print("Testing knowledge base chunk counts...")
     
     try:
-        # Initialize embeddings service (this will load KB and generate embeddings)
-        embeddings_service = EmbeddingsService()
-        embeddings_service.initialize_knowledge_base()
+        # Parse the files directly so an on-disk cache cannot mask a parser regression
+        kb_service = KnowledgeBaseService()
+        chunks = []
+        for file_name in KB_HTML_FILES:
+            file_path = os.path.join(kb_service.data_directory, file_name)
+            if os.path.exists(file_path):
+                chunks += kb_service._parse_html_file(file_path, file_name)
         
-        print(f"\n✅ Embeddings service initialized with {len(embeddings_service.chunks)} chunks")
+        header_count = sum(1 for chunk in chunks if chunk.chunk_id.endswith("_header"))
+        table_and_contact_count = len(chunks) - header_count
+        print(f"Header chunks: {header_count}, table/contact chunks: {table_and_contact_count}")
         
-        # Test search without profile filtering
-        print(f"\n🔎 Searching without profile filter...")
-        results = embeddings_service.search_similar(query, top_k=5)
+        if (header_count, table_and_contact_count) != (EXPECTED_HEADER_CHUNKS, EXPECTED_TABLE_AND_CONTACT_CHUNKS):
+            print(f"❌ Expected {EXPECTED_HEADER_CHUNKS} header and "
+                  f"{EXPECTED_TABLE_AND_CONTACT_CHUNKS} table/contact chunks")
+            return False
         
-        # Test search with HMO filtering
-        print(f"\n🔎 Searching with Maccabi Gold filter...")
-        maccabi_results = embeddings_service.search_similar(query, user_hmo="מכבי", user_tier="זהב", top_k=5)
+        print(f"✅ Chunk counts match the original parser ({len(chunks)} chunks)")
+        return True
         
-        # Test search with different HMO
-        print(f"\n🔎 Searching with Clalit Silver filter...")
-        clalit_results = embeddings_service.search_similar(query, user_hmo="כללית", user_tier="כסף", top_k=5)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+async def _run_embeddings_search(query):
+    # The Azure client is a process-wide singleton whose connection pool is bound to
+    # the loop that first used it; close it before this run's loop ends so the next
+    # asyncio.run creates a fresh one
+    try:
+        await _search_with_embeddings(query)
+    finally:
+        await close_async_client()
+
+async def _search_with_embeddings(query):
+    # Initialize embeddings service on the already-loaded KB; embeddings come from the
+    # on-disk cache, only new or changed chunks are embedded
+    embeddings_service = EmbeddingsService()
+    embeddings_service.kb_service = _get_kb_service()
+    await embeddings_service.initialize_knowledge_base()
+    
+    print(f"\n✅ Embeddings service initialized with {len(embeddings_service.chunks)} chunks")
+    
+    # Test search without profile filtering
+    print(f"\n🔎 Searching without profile filter...")
+    results = await embeddings_service.search_similar(query, top_k=5)
+    
+    # Test search with HMO filtering
+    print(f"\n🔎 Searching with Maccabi Gold filter...")
+    maccabi_results = await embeddings_service.search_similar(query, user_hmo="מכבי", user_tier="זהב", top_k=5)
+    
+    # Test search with different HMO
+    print(f"\n🔎 Searching with Clalit Silver filter...")
+    clalit_results = await embeddings_service.search_similar(query, user_hmo="כללית", user_tier="כסף", top_k=5)
+
+def test_embeddings_search(query):
+    print(f"\n🔍 Testing Embeddings Search for: '{query}'")
+    print("="*60)
+    
+    try:
+        # Run the whole search session on one event loop (the async client is loop-bound)
+        asyncio.run(_run_embeddings_search(query))
         
         print(f"\n✅ Search completed successfully!")
         return True
@@ -91,6 +148,7 @@ if __name__ == "__main__":
     else:
         # Run basic KB test
         success = test_knowledge_base()
+        success = success and test_chunk_counts()
         
         # Also run a sample embeddings test
         print("\n" + "="*60)
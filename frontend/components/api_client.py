@@ -1,80 +1,175 @@
 """
 Backend API communication client
 """
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import streamlit as st
-from typing import Dict, Any, Optional, Tuple
+from typing import Callable, Dict, Any, Iterator, Optional, Tuple
 import time
 import json
-from config.settings import ENDPOINTS
-from components.session_manager import SessionManager
+import string
+from config.settings import BACKEND_BASE_URL, ENDPOINTS, CHAT_HISTORY_WINDOW
+from components.session_manager import SessionManager, UserProfile, PROFILE_FIELDS
+
+# Answered chat requests kept per session, so repeated questions skip the backend
+CHAT_CACHE_SIZE = 64
+
+# Seconds a successful backend response counts as a passing health check
+HEALTH_CHECK_TTL = 30
+
+# Seconds to wait for /health; a healthy backend answers in milliseconds
+HEALTH_CHECK_TIMEOUT = 2
+
+# Seconds a failed check is reused, so a down backend does not stall every rerun
+HEALTH_FAILURE_TTL = 5
+
+# Retries for failed connections and gateway errors, with exponential backoff (seconds)
+MAX_RETRIES = 3
+RETRY_BACKOFF = 1
+
+# Punctuation ignored when matching repeated questions
+_QUESTION_PUNCTUATION = str.maketrans("", "", string.punctuation + "״׳")
+
+# Hebrew prefixes for the error codes _make_request attaches
+_ERROR_CODES_HE = {
+    "backend_unreachable": "לא ניתן להתחבר לשרת",
+    "timeout": "זמן הקשר פג",
+    "validation": "שגיאה בוולידציה",
+    "invalid_response": "תגובה לא תקינה מהשרת"
+}
+
+# Hebrew prefixes matched against the message of errors that carry no code
+_ERROR_MESSAGES_HE = {
+    "Cannot connect to backend server": "לא ניתן להתחבר לשרת",
+    "Request timeout": "זמן הקשר פג",
+    "Validation error": "שגיאה בוולידציה",
+    "Invalid JSON response from server": "תגובה לא תקינה מהשרת",
+    "HTTP 422": "שגיאה בפורמט הבקשה"
+}
+
+# Fields masked by format_request_for_logging
+_SENSITIVE_FIELDS = frozenset({"id_number", "hmo_card_number", "phone_number"})
+
+# Request bodies are serialized with orjson and sent as pre-encoded bytes
+_JSON_HEADERS = {"Content-Type": "application/json"}
+# SSE must not be compressed: a gzip stream holds tokens back until its buffer fills
+_STREAM_HEADERS = {**_JSON_HEADERS, "Accept-Encoding": "identity"}
+
+def _encode_json(data: Dict[str, Any]) -> bytes:
+    return orjson.dumps(data, option=orjson.OPT_SERIALIZE_DATACLASS | orjson.OPT_NON_STR_KEYS)
+
+# Bytes of a failed response's body kept in the error dict
+ERROR_BODY_PREVIEW_BYTES = 512
+
+def _error_response_result(response: requests.Response) -> Dict[str, Any]:
+    """Error dict for a non-200 response"""
+    body = response.content
+    if response.status_code == 422:
+        # Validation error
+        try:
+            return {"error": "Validation error", "details": orjson.loads(body), "code": "validation"}
+        except json.JSONDecodeError:
+            return {"error": "Validation error (invalid response format)", "code": "validation"}
+    
+    # Only a bounded preview of the body is decoded (error pages can be large HTML)
+    return {
+        "error": f"HTTP {response.status_code}",
+        "code": "http_error",
+        "body_preview": body[:ERROR_BODY_PREVIEW_BYTES].decode("utf-8", "replace"),
+        "body_bytes": len(body)
+    }
+
+def _profile_payload(profile: Dict[str, Any]) -> Dict[str, Any]:
+    """Profile dict in UserProfile.to_dict() form"""
+    # Dicts straight from UserProfile.to_dict() (same keys, same order) need no round-trip
+    if tuple(profile) == PROFILE_FIELDS:
+        return profile
+    return UserProfile(**profile).to_dict()
+
+def _normalize_question(question: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return " ".join(question.lower().translate(_QUESTION_PUNCTUATION).split())
+
+@st.cache_resource
+def get_http_session() -> requests.Session:
+    """
+    Pooled keep-alive session shared by every Streamlit session in the process;
+    retries connection failures and gateway errors, except on the health probe
+    """
+    retry = Retry(
+        total=MAX_RETRIES,
+        backoff_factor=RETRY_BACKOFF,
+        status_forcelist=[502, 503, 504],
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=32, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    # Longest prefix wins: /health gets a single attempt so a down backend is reported
+    # within HEALTH_CHECK_TIMEOUT instead of after the retry backoff
+    session.mount(f"{BACKEND_BASE_URL}{ENDPOINTS['health']}", HTTPAdapter(max_retries=0))
+    return session
 
 class APIClient:
     """Handle all backend API communications"""
     
     def __init__(self):
-        self.base_url = SessionManager.get_backend_url()
+        # The configured URL rather than a session-state copy: the client is
+        # built once per process, possibly before any session is initialized
+        self.base_url = BACKEND_BASE_URL
         self.timeout = 30
-        self.max_retries = 3
-        self.retry_delay = 1
+        self.max_retries = MAX_RETRIES
+        self.retry_delay = RETRY_BACKOFF
+        self.session = get_http_session()
     
     def _make_request(self, method: str, endpoint: str, data: Dict[str, Any] = None, 
-                     params: Dict[str, Any] = None) -> Tuple[bool, Dict[str, Any]]:
+                     params: Dict[str, Any] = None, timeout: Optional[float] = None) -> Tuple[bool, Dict[str, Any]]:
         """
-        Make HTTP request with retry logic and error handling
+        Make HTTP request with error handling (retries come from the session adapter)
         """
         url = f"{self.base_url}{endpoint}"
+        timeout = timeout or self.timeout
         
-        for attempt in range(self.max_retries):
-            try:
-                if method.upper() == "GET":
-                    response = requests.get(url, params=params, timeout=self.timeout)
-                elif method.upper() == "POST":
-                    response = requests.post(url, json=data, timeout=self.timeout)
-                else:
-                    return False, {"error": f"Unsupported HTTP method: {method}"}
-                
-                # Check if request was successful
-                if response.status_code == 200:
-                    try:
-                        result = response.json()
-                        SessionManager.set_backend_status(True)
-                        return True, result
-                    except json.JSONDecodeError:
-                        return False, {"error": "Invalid JSON response from server"}
-                
-                elif response.status_code == 422:
-                    # Validation error
-                    try:
-                        error_detail = response.json()
-                        return False, {"error": "Validation error", "details": error_detail}
-                    except json.JSONDecodeError:
-                        return False, {"error": "Validation error (invalid response format)"}
-                
-                else:
-                    return False, {"error": f"HTTP {response.status_code}: {response.text}"}
-            
-            except requests.exceptions.ConnectionError:
-                if attempt == self.max_retries - 1:
-                    SessionManager.set_backend_status(False)
-                    return False, {"error": "Cannot connect to backend server"}
-                time.sleep(self.retry_delay * (attempt + 1))
+        try:
+            if method.upper() == "GET":
+                response = self.session.get(url, params=params, timeout=timeout)
+            elif method.upper() == "POST":
+                response = self.session.post(url, data=_encode_json(data), headers=_JSON_HEADERS,
+                                             timeout=timeout)
+            else:
+                return False, {"error": f"Unsupported HTTP method: {method}", "code": "request_failed"}
             
-            except requests.exceptions.Timeout:
-                if attempt == self.max_retries - 1:
-                    return False, {"error": "Request timeout"}
-                time.sleep(self.retry_delay * (attempt + 1))
+            # Check if request was successful
+            if response.status_code == 200:
+                try:
+                    result = orjson.loads(response.content)
+                    SessionManager.set_backend_status(True)
+                    return True, result
+                except json.JSONDecodeError:
+                    return False, {"error": "Invalid JSON response from server", "code": "invalid_response"}
             
-            except requests.exceptions.RequestException as e:
-                return False, {"error": f"Request failed: {str(e)}"}
+            else:
+                return False, _error_response_result(response)
+        
+        # Retries are handled by the session's adapter; these are final failures
+        except requests.exceptions.ConnectionError:
+            SessionManager.set_backend_status(False)
+            return False, {"error": "Cannot connect to backend server", "code": "backend_unreachable"}
         
-        return False, {"error": "Max retries exceeded"}
+        except requests.exceptions.Timeout:
+            return False, {"error": "Request timeout", "code": "timeout"}
+        
+        except requests.exceptions.RequestException as e:
+            return False, {"error": f"Request failed: {str(e)}", "code": "request_failed"}
     
     def check_backend_health(self) -> Tuple[bool, Dict[str, Any]]:
         """
         Check if backend is healthy and responsive
         """
-        return self._make_request("GET", ENDPOINTS["health"])
+        return self._make_request("GET", ENDPOINTS["health"], timeout=HEALTH_CHECK_TIMEOUT)
     
     def get_kb_stats(self) -> Tuple[bool, Dict[str, Any]]:
         """
@@ -95,12 +190,9 @@ class APIClient:
         }
         """
         # Convert current_profile dict to UserProfile structure if needed
-        from components.session_manager import UserProfile
         if isinstance(current_profile, dict):
-            # Create UserProfile object to ensure proper structure
             try:
-                profile_obj = UserProfile(**current_profile)
-                user_profile = profile_obj.to_dict()
+                user_profile = _profile_payload(current_profile)
             except Exception as e:
                 # If conversion fails, use empty profile
                 user_profile = UserProfile().to_dict()
@@ -108,7 +200,6 @@ class APIClient:
             user_profile = UserProfile().to_dict()
         
         # Get current language preference
-        from components.session_manager import SessionManager
         language = SessionManager.get_language()
         
         data = {
@@ -141,15 +232,105 @@ class APIClient:
             "context_used": true
         }
         """
+        data, cache_key = self._prepare_chat_request(user_question, user_profile, conversation_history)
+        
+        # Same question with the same prompt inputs -> reuse the earlier answer
+        cached_response = self._get_cached_chat_response(cache_key)
+        if cached_response is not None:
+            return True, cached_response
+        
+        success, response = self._make_request("POST", ENDPOINTS["chat"], data)
+        return self._finish_chat_response(success, response, cache_key)
+    
+    def stream_chat_request(self, user_question: str,
+                            user_profile: Dict[str, Any],
+                            conversation_history: list = None,
+                            on_token: Optional[Callable[[str], None]] = None) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Send chat request to the streaming endpoint.
+        on_token is called with the answer received so far as tokens arrive;
+        the return value has the same format as send_chat_request.
+        """
+        data, cache_key = self._prepare_chat_request(user_question, user_profile, conversation_history)
+        
+        cached_response = self._get_cached_chat_response(cache_key)
+        if cached_response is not None:
+            return True, cached_response
+        
+        success, response = self._send_chat_stream(data, on_token)
+        return self._finish_chat_response(success, response, cache_key)
+    
+    def stream_chat(self, data: Dict[str, Any]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        POST to /chat/stream on the pooled session and yield (event, payload) per SSE event.
+        A non-stream JSON body (profile errors) is yielded once as a "response" event.
+        """
+        url = f"{self.base_url}{ENDPOINTS['chat_stream']}"
+        with self.session.post(url, data=_encode_json(data), headers=_STREAM_HEADERS,
+                               timeout=self.timeout, stream=True) as response:
+            if response.status_code != 200:
+                yield "http_error", _error_response_result(response)
+                return
+            
+            SessionManager.set_backend_status(True)
+            
+            if response.headers.get("content-type", "").startswith("application/json"):
+                yield "response", orjson.loads(response.content)
+                return
+            
+            event = "message"
+            for line in response.iter_lines():
+                if line.startswith(b"event:"):
+                    event = line[6:].decode().strip()
+                elif line.startswith(b"data:"):
+                    yield event, orjson.loads(line[5:])
+    
+    def _send_chat_stream(self, data: Dict[str, Any],
+                          on_token: Optional[Callable[[str], None]] = None) -> Tuple[bool, Dict[str, Any]]:
+        """Assemble the streamed events into a /chat style response"""
+        result = {"status": "answered", "answer": "", "sources": [], "context_used": False, "retrieved_chunks": []}
+        answer = ""
+        
+        try:
+            for event, payload in self.stream_chat(data):
+                if event == "token":
+                    answer += payload["content"]
+                    if on_token:
+                        on_token(answer)
+                elif event == "response":
+                    return True, payload
+                elif event == "http_error":
+                    return False, payload
+                elif event != "done":
+                    # "sources", "no_match" and "error" carry response fields
+                    result.update(payload)
+        
+        # Retries are handled by the session's adapter; these are final failures
+        except requests.exceptions.ConnectionError:
+            SessionManager.set_backend_status(False)
+            return False, {"error": "Cannot connect to backend server", "code": "backend_unreachable"}
+        
+        except requests.exceptions.Timeout:
+            return False, {"error": "Request timeout", "code": "timeout"}
+        
+        except json.JSONDecodeError:
+            return False, {"error": "Invalid JSON response from server", "code": "invalid_response"}
+        
+        except requests.exceptions.RequestException as e:
+            return False, {"error": f"Request failed: {str(e)}", "code": "request_failed"}
+        
+        if result["status"] == "answered":
+            result["answer"] = answer
+        return True, result
+    
+    def _prepare_chat_request(self, user_question: str, user_profile: Dict[str, Any],
+                              conversation_history: list) -> Tuple[Dict[str, Any], tuple]:
+        """Build the chat request body and its cache key"""
         # Convert user_profile dict to UserProfile structure if needed
-        from components.session_manager import UserProfile
         if isinstance(user_profile, dict):
-            # Create UserProfile object to ensure proper structure
-            profile_obj = UserProfile(**user_profile)
-            user_profile = profile_obj.to_dict()
+            user_profile = _profile_payload(user_profile)
         
         # Pass current UI language to backend so answers are in the same language
-        from components.session_manager import SessionManager
         language = SessionManager.get_language()
         data = {
             "message": user_question,
@@ -157,8 +338,25 @@ class APIClient:
             "history": conversation_history or [],
             "language": language
         }
-        
-        success, response = self._make_request("POST", ENDPOINTS["chat"], data)
+        cache_key = self._chat_cache_key(user_question, user_profile, conversation_history, language)
+        return data, cache_key
+    
+    def _get_cached_chat_response(self, cache_key: tuple) -> Optional[Dict[str, Any]]:
+        cache = SessionManager.get_chat_cache()
+        cached_response = cache.get(cache_key)
+        if cached_response is None:
+            return None
+        cache.move_to_end(cache_key)
+        return dict(cached_response)
+    
+    def _finish_chat_response(self, success: bool, response: Dict[str, Any],
+                              cache_key: tuple) -> Tuple[bool, Dict[str, Any]]:
+        """Cache answered responses and print debug info"""
+        if success and response.get("status") == "answered":
+            cache = SessionManager.get_chat_cache()
+            cache[cache_key] = response
+            if len(cache) > CHAT_CACHE_SIZE:
+                cache.popitem(last=False)
         
         if success and SessionManager.get_debug_mode():
             st.write("**Debug - Chat Response:**")
@@ -172,6 +370,21 @@ class APIClient:
         
         return success, response
     
+    def _chat_cache_key(self, user_question: str, user_profile: Dict[str, Any],
+                        conversation_history: list, language: str) -> tuple:
+        """Cache key covering everything the backend puts in the prompt"""
+        # The backend only uses the last CHAT_HISTORY_WINDOW exchanges
+        recent_history = tuple(
+            (exchange.get("user", ""), exchange.get("assistant", ""))
+            for exchange in (conversation_history or [])[-CHAT_HISTORY_WINDOW:]
+        )
+        return (
+            _normalize_question(user_question),
+            user_profile.get("hmo"), user_profile.get("membership_tier"),
+            user_profile.get("first_name"), user_profile.get("last_name"), user_profile.get("age"),
+            language, recent_history
+        )
+    
     def handle_api_error(self, error_data: Dict[str, Any], language: str = "he") -> str:
         """
         Format API error for user display
@@ -186,15 +399,12 @@ class APIClient:
         
         # Translate common errors
         if language == "he":
-            error_translations = {
-                "Cannot connect to backend server": "לא ניתן להתחבר לשרת",
-                "Request timeout": "זמן הקשר פג", 
-                "Validation error": "שגיאה בוולידציה",
-                "Invalid JSON response from server": "תגובה לא תקינה מהשרת",
-                "HTTP 422": "שגיאה בפורמט הבקשה"
-            }
+            he_error = _ERROR_CODES_HE.get(error_data.get("code"))
+            if he_error:
+                return f"{he_error}: {error_msg}"
             
-            for eng_error, he_error in error_translations.items():
+            # Legacy fallback for error dicts without a code
+            for eng_error, he_error in _ERROR_MESSAGES_HE.items():
                 if eng_error in error_msg:
                     return f"{he_error}: {error_msg}"
         
@@ -204,13 +414,9 @@ class APIClient:
         """
         Format request data for logging (remove sensitive info)
         """
-        safe_data = data.copy()
-        
-        # Remove or mask sensitive fields
-        sensitive_fields = ["id_number", "hmo_card_number", "phone_number"]
-        for field in sensitive_fields:
-            if field in safe_data:
-                safe_data[field] = "***masked***"
+        # Mask sensitive fields; the payload is only copied when there is something to mask
+        masked = {field: "***masked***" for field in _SENSITIVE_FIELDS if field in data}
+        safe_data = {**data, **masked} if masked else data
         
         return {
             "endpoint": endpoint,
@@ -218,10 +424,19 @@ class APIClient:
             "data": safe_data
         }
     
-    def test_connection(self) -> bool:
+    def test_connection(self, force: bool = False) -> bool:
         """
-        Test backend connection and update session state
+        Test backend connection and update session state (force skips the cached result)
         """
+        # Skip /health when a request just succeeded or a check just failed
+        if not force:
+            status = SessionManager.get_backend_status()
+            age = SessionManager.get_backend_status_age()
+            if status is True and age < HEALTH_CHECK_TTL:
+                return True
+            if status is False and age < HEALTH_FAILURE_TTL:
+                return False
+        
         success, response = self.check_backend_health()
         SessionManager.set_backend_status(success)
         return success
@@ -239,10 +454,16 @@ def send_chat_request(user_question: str, user_profile: Dict[str, Any],
     """Convenience function for chat requests"""
     return api_client.send_chat_request(user_question, user_profile, conversation_history)
 
+def stream_chat_request(user_question: str, user_profile: Dict[str, Any],
+                        conversation_history: list = None,
+                        on_token: Optional[Callable[[str], None]] = None) -> Tuple[bool, Dict[str, Any]]:
+    """Convenience function for streamed chat requests"""
+    return api_client.stream_chat_request(user_question, user_profile, conversation_history, on_token)
+
 def check_backend_health() -> Tuple[bool, Dict[str, Any]]:
     """Convenience function for health check"""
     return api_client.check_backend_health()
 
-def test_backend_connection() -> bool:
+def test_backend_connection(force: bool = False) -> bool:
     """Convenience function to test connection"""
-    return api_client.test_connection()
+    return api_client.test_connection(force)
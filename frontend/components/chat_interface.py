@@ -4,10 +4,16 @@ Phase 2: Medical Q&A chat interface
 import streamlit as st
 from typing import Dict, Any, List
 from components.session_manager import SessionManager, ChatMessage
-from components.api_client import send_chat_request
+from components.api_client import stream_chat_request
 from utils.formatters import format_profile_display, format_debug_info, truncate_text
 from utils.hebrew_support import wrap_rtl_content, is_rtl_text, format_chat_bubble_rtl
-from config.settings import MESSAGES
+from config.settings import MESSAGES, CHAT_HISTORY_WINDOW
+
+# Fixed chat texts, built once instead of per render
+INITIAL_MESSAGE_HE = "שאל אותי כל שאלה רפואית והיא תענה בהתבסס על הפרופיל שלך"
+INITIAL_MESSAGE_EN = "Ask me any medical question and I'll answer based on your profile and my medical knowledge."
+INPUT_PLACEHOLDER_HE = "שאל שאלה רפואית..."
+INPUT_PLACEHOLDER_EN = "Ask a medical question..."
 
 class ChatInterface:
     """Handle medical Q&A chat workflow"""
@@ -74,6 +80,7 @@ class ChatInterface:
             st.error(messages["backend_error"])
             
             if st.button("🔄 Retry Connection" if language == "en" else "🔄 נסה שוב"):
+                test_backend_connection(force=True)
                 st.rerun()
             
             return False
@@ -92,10 +99,7 @@ class ChatInterface:
                 # Show initial message
                 language = self.session_manager.get_language()
                 
-                if language == "he":
-                    initial_msg = "שאל אותי כל שאלה רפואית והיא תענה בהתבסס על הפרופיל שלך"
-                else:
-                    initial_msg = "Ask me any medical question and I'll answer based on your profile and my medical knowledge."
+                initial_msg = INITIAL_MESSAGE_HE if language == "he" else INITIAL_MESSAGE_EN
                 
                 with st.chat_message("assistant"):
                     st.write(wrap_rtl_content(initial_msg) if is_rtl_text(initial_msg) else initial_msg,
@@ -110,19 +114,17 @@ class ChatInterface:
         """Render individual chat message"""
         if message.is_user:
             with st.chat_message("user"):
-                content = message.content
-                if is_rtl_text(content):
-                    st.markdown(wrap_rtl_content(content), unsafe_allow_html=True)
+                if message.is_rtl:
+                    st.markdown(message.display_content, unsafe_allow_html=True)
                 else:
-                    st.write(content)
+                    st.write(message.content)
         
         else:
             with st.chat_message("assistant"):
-                content = message.content
-                if is_rtl_text(content):
-                    st.markdown(wrap_rtl_content(content), unsafe_allow_html=True)
+                if message.is_rtl:
+                    st.markdown(message.display_content, unsafe_allow_html=True)
                 else:
-                    st.write(content)
+                    st.write(message.content)
                 
                 # Show sources if available
                 if message.sources:
@@ -156,10 +158,7 @@ class ChatInterface:
         language = self.session_manager.get_language()
         
         # Chat input
-        if language == "he":
-            placeholder = "שאל שאלה רפואית..."
-        else:
-            placeholder = "Ask a medical question..."
+        placeholder = INPUT_PLACEHOLDER_HE if language == "he" else INPUT_PLACEHOLDER_EN
         
         user_input = st.chat_input(placeholder)
         
@@ -171,27 +170,9 @@ class ChatInterface:
         # Add user message to conversation
         self.session_manager.add_chat_message(user_input, is_user=True)
         
-        # Get profile and conversation history
+        # Get profile and the recent conversation history (excluding the current message)
         profile = self.session_manager.get_user_profile()
-        conversation = self.session_manager.get_conversation_history()
-        
-        # Convert conversation to format expected by backend
-        conversation_history = []
-        for msg in conversation[:-1]:  # Exclude the current message
-            if msg.is_user:
-                conversation_history.append({
-                    "user": msg.content,
-                    "assistant": ""
-                })
-            else:
-                # If it's an assistant message, add it to the last exchange
-                if conversation_history and "assistant" in conversation_history[-1]:
-                    conversation_history[-1]["assistant"] = msg.content
-                else:
-                    conversation_history.append({
-                        "user": "",
-                        "assistant": msg.content
-                    })
+        conversation_history = self.session_manager.get_conversation_pairs()[-CHAT_HISTORY_WINDOW - 1:-1]
         
         # Show user message immediately
         with st.chat_message("user"):
@@ -202,100 +183,113 @@ class ChatInterface:
         
         # Process with backend
         with st.chat_message("assistant"):
-            with st.spinner("Thinking..." if self.session_manager.get_language() == "en" else "חושב..."):
-                success, response = send_chat_request(
-                    user_input, 
-                    profile.to_dict(), 
-                    conversation_history
-                )
+            # Shows an ellipsis until the first token, then the answer as it streams in
+            answer_placeholder = st.empty()
+            answer_placeholder.markdown("…")
+            
+            def render_partial_answer(partial_answer: str):
+                self._render_answer(answer_placeholder, partial_answer)
+            
+            success, response = stream_chat_request(
+                user_input, 
+                profile.to_dict(), 
+                conversation_history,
+                on_token=render_partial_answer
+            )
+            
+            if success:
+                # Extract response data (backend returns "answer" not "response")
+                bot_response = response.get("answer", "")
+                sources = response.get("sources", [])
+                retrieved_chunks = response.get("retrieved_chunks", [])
+                context_used = response.get("context_used", False)
+                status = response.get("status", "answered")
                 
-                if success:
-                    # Extract response data (backend returns "answer" not "response")
-                    bot_response = response.get("answer", "")
-                    sources = response.get("sources", [])
-                    retrieved_chunks = response.get("retrieved_chunks", [])
-                    context_used = response.get("context_used", False)
-                    status = response.get("status", "answered")
-                    
-                    # Handle non-standard statuses explicitly so the UI doesn't look frozen
-                    if status != "answered":
-                        lang = self.session_manager.get_language()
-                        if status == "registration_required":
-                            msg = (
-                                "Please complete your registration first in the previous step."
-                                if lang == "en"
-                                else "יש להשלים את תהליך הרישום לפני תחילת הצ'אט."
-                            )
-                            st.warning(msg)
-                            # Offer navigation back to profile collection
-                            back_text = "Back to Profile" if lang == "en" else "חזרה לפרופיל"
-                            if st.button(back_text, key="back_to_profile_from_chat_warning"):
-                                self.session_manager.set_phase("profile_collection")
-                                st.rerun()
-                        elif status == "no_match":
-                            msg = (
-                                "I couldn't find a relevant answer in the knowledge base. Try rephrasing or adding details."
-                                if lang == "en"
-                                else "לא נמצא מענה רלוונטי במאגר הידע. נסו לנסח מחדש או להוסיף פרטים."
-                            )
-                            st.info(msg)
-                        else:
-                            # Fallback informative message
-                            msg = (
-                                "I'm having trouble answering right now. Please try again."
-                                if lang == "en"
-                                else "מתקשה לענות כרגע. נסו שוב."
-                            )
-                            st.info(msg)
-                        # Record the system message in the conversation for completeness
-                        self.session_manager.add_chat_message(msg, is_user=False)
-                        return
-                    
-                    # Display response
-                    if is_rtl_text(bot_response):
-                        st.markdown(wrap_rtl_content(bot_response), unsafe_allow_html=True)
+                # Handle non-standard statuses explicitly so the UI doesn't look frozen
+                if status != "answered":
+                    answer_placeholder.empty()
+                    lang = self.session_manager.get_language()
+                    if status == "registration_required":
+                        msg = (
+                            "Please complete your registration first in the previous step."
+                            if lang == "en"
+                            else "יש להשלים את תהליך הרישום לפני תחילת הצ'אט."
+                        )
+                        st.warning(msg)
+                        # Offer navigation back to profile collection
+                        back_text = "Back to Profile" if lang == "en" else "חזרה לפרופיל"
+                        if st.button(back_text, key="back_to_profile_from_chat_warning"):
+                            self.session_manager.set_phase("profile_collection")
+                            st.rerun()
+                    elif status == "no_match":
+                        msg = (
+                            "I couldn't find a relevant answer in the knowledge base. Try rephrasing or adding details."
+                            if lang == "en"
+                            else "לא נמצא מענה רלוונטי במאגר הידע. נסו לנסח מחדש או להוסיף פרטים."
+                        )
+                        st.info(msg)
                     else:
-                        st.write(bot_response)
-                    
-                    # Show sources
-                    if sources:
-                        self._render_sources(sources)
-                    
-                    # Prepare debug info
-                    debug_info = {
-                        "retrieved_chunks_count": len(retrieved_chunks),
-                        "context_used": context_used,
-                        "sources_count": len(sources),
-                        "status": status
-                    }
-                    
-                    if self.session_manager.get_debug_mode():
-                        debug_info["retrieved_chunks"] = retrieved_chunks
-                        self._render_debug_info(debug_info)
-                    
-                    # Add bot message to conversation
-                    self.session_manager.add_chat_message(
-                        bot_response, 
-                        is_user=False, 
-                        sources=sources,
-                        debug_info=debug_info
-                    )
+                        # Fallback informative message
+                        msg = (
+                            "I'm having trouble answering right now. Please try again."
+                            if lang == "en"
+                            else "מתקשה לענות כרגע. נסו שוב."
+                        )
+                        st.info(msg)
+                    # Record the system message in the conversation for completeness
+                    self.session_manager.add_chat_message(msg, is_user=False)
+                    return
                 
-                else:
-                    # Handle API error
-                    from components.api_client import api_client
-                    error_msg = api_client.handle_api_error(response, self.session_manager.get_language())
-                    
-                    st.error(error_msg)
-                    
-                    # Add error message to conversation
-                    self.session_manager.add_chat_message(
-                        f"Error: {error_msg}", 
-                        is_user=False
-                    )
-        
-        # Rerun to update the interface
-        st.rerun()
+                # Display response
+                self._render_answer(answer_placeholder, bot_response)
+                
+                # Show sources
+                if sources:
+                    self._render_sources(sources)
+                
+                # Prepare debug info
+                debug_info = {
+                    "retrieved_chunks_count": len(retrieved_chunks),
+                    "context_used": context_used,
+                    "sources_count": len(sources),
+                    "status": status
+                }
+                
+                if self.session_manager.get_debug_mode():
+                    debug_info["retrieved_chunks"] = retrieved_chunks
+                    self._render_debug_info(debug_info)
+                
+                # Add bot message to conversation
+                self.session_manager.add_chat_message(
+                    bot_response, 
+                    is_user=False, 
+                    sources=sources,
+                    debug_info=debug_info
+                )
+            
+            else:
+                # Handle API error
+                from components.api_client import api_client
+                error_msg = api_client.handle_api_error(response, self.session_manager.get_language())
+                
+                answer_placeholder.empty()
+                st.error(error_msg)
+                
+                # Add error message to conversation
+                self.session_manager.add_chat_message(
+                    f"Error: {error_msg}", 
+                    is_user=False
+                )
+    
+        # Both messages are already rendered inline and the sidebar is drawn after
+        # this returns, so no rerun is needed to show the new turn
+    
+    def _render_answer(self, placeholder, answer: str):
+        """Render the (possibly partial) assistant answer into its placeholder"""
+        if is_rtl_text(answer):
+            placeholder.markdown(wrap_rtl_content(answer), unsafe_allow_html=True)
+        else:
+            placeholder.write(answer)
     
     def _render_sidebar(self):
         """Render sidebar with profile and controls"""
@@ -5,6 +5,20 @@ import streamlit as st
 from .session_manager import SessionManager
 from config.settings import PHASE_COLLECTION
 
+# Static bilingual blocks (the same for every user and language)
+_SELECT_LANGUAGE_HTML = """
+<div style='text-align: center; margin: 2rem 0;'>
+    <h3>Please select your preferred language</h3>
+    <h3 style='direction: rtl;'>אנא בחר את השפה המועדפת עליך</h3>
+</div>
+"""
+
+_INFO_HTML = """
+<div style='text-align: center; color: #666; font-size: 0.9rem;'>
+    <p>This system will help you register for health services and get personalized medical information</p>
+    <p style='direction: rtl;'>מערכת זו תעזור לך להירשם לשירותי בריאות ולקבל מידע רפואי מותאם אישית</p>
+</div>
+"""
 
 class LanguageSelector:
     """Handle language selection interface"""
@@ -26,12 +40,7 @@ class LanguageSelector:
             st.markdown("---")
             
             # Language selection prompt in both languages
-            st.markdown("""
-            <div style='text-align: center; margin: 2rem 0;'>
-                <h3>Please select your preferred language</h3>
-                <h3 style='direction: rtl;'>אנא בחר את השפה המועדפת עליך</h3>
-            </div>
-            """, unsafe_allow_html=True)
+            st.markdown(_SELECT_LANGUAGE_HTML, unsafe_allow_html=True)
             
             # Language selection buttons
             col_he, col_en = st.columns(2)
@@ -56,12 +65,7 @@ class LanguageSelector:
             
             # Additional info
             st.markdown("---")
-            st.markdown("""
-            <div style='text-align: center; color: #666; font-size: 0.9rem;'>
-                <p>This system will help you register for health services and get personalized medical information</p>
-                <p style='direction: rtl;'>מערכת זו תעזור לך להירשם לשירותי בריאות ולקבל מידע רפואי מותאם אישית</p>
-            </div>
-            """, unsafe_allow_html=True)
+            st.markdown(_INFO_HTML, unsafe_allow_html=True)
     
     def _select_language(self, language: str):
         """Handle language selection and proceed to profile collection"""
@@ -2,13 +2,87 @@
 Phase 1: User profile collection interface
 """
 import streamlit as st
-from typing import Dict, Any, Optional
-from components.session_manager import SessionManager, UserProfile
+from functools import lru_cache
+from typing import Dict, Mapping
+from components.session_manager import SessionManager
 from components.api_client import send_profile_collection_request
-from utils.validators import validate_complete_profile, validate_profile_field
-from utils.formatters import format_profile_display, format_progress_percentage, format_validation_errors
-from utils.hebrew_support import wrap_rtl_content, is_rtl_text
-from config.settings import MESSAGES, REQUIRED_FIELDS
+from utils.validators import validate_complete_profile
+from utils.formatters import format_profile_display, format_validation_errors
+from utils.hebrew_support import wrap_rtl_content
+from config.settings import MESSAGES, FIELD_LABELS, REQUIRED_FIELDS, REQUIRED_FIELDS_COUNT
+
+@lru_cache(maxsize=32)
+def _rtl_wrap(text: str) -> str:
+    """RTL-wrapped text (the pending question is re-rendered on every rerun)"""
+    return wrap_rtl_content(text)
+
+# Fixed texts of the collection screens, per language
+_COLLECTION_TEXTS = {
+    "he": {
+        "welcome": "🏥 ברוכים הבאים למערכת הבריאות החכמה!",
+        "subtitle": "המערכת תעזור לך להירשם ולקבל מידע רפואי מותאם אישית",
+        "instruction_html": '<h2 style="text-align: center; direction: rtl;">👇 לחץ על הכפתור כדי להתחיל</h2>',
+        "start": "🚀 התחל רישום",
+        "initial_input": "שלום, אני רוצה להירשם",
+        "info": "💡 המערכת תשאל אותך שאלות כדי לאסוף את הפרטים הנחוצים לרישום",
+        "input_placeholder": "הקלד את תגובתך כאן...",
+        "collection_complete": "איסוף הפרטים הושלם בהצלחה!",
+        "completion_prompt": "**הפרופיל שלך הושלם! מה תרצה לעשות עכשיו?**",
+        "review": "סקור פרטים",
+        "edit": "ערוך פרטים",
+        "processing": "מעבד..."
+    },
+    "en": {
+        "welcome": "🏥 Welcome to the Smart Health System!",
+        "subtitle": "This system will help you register and get personalized medical information",
+        "instruction_html": '<h2 style="text-align: center;">👇 Click the button below to get started</h2>',
+        "start": "🚀 Let's start",
+        "initial_input": "Hi, I want to register",
+        "info": "💡 The system will ask you questions to collect the necessary information for registration",
+        "input_placeholder": "Type your response here...",
+        "collection_complete": "Profile collection completed successfully!",
+        "completion_prompt": "**Your profile is complete! What would you like to do now?**",
+        "review": "Review Details",
+        "edit": "Edit Details",
+        "processing": "Processing..."
+    }
+}
+
+_TEXT_INPUT_FIELDS = ("first_name", "last_name", "id_number", "age", "hmo_card_number", "phone_number", "email")
+
+def _selection_choices(rows) -> Dict[str, tuple]:
+    """
+    Selectbox tables from (stored value, Hebrew label, English label) rows.
+    Per language: (display options, any known value -> display option,
+    any known value -> stored value)
+    """
+    row_of = {value: row for row in rows for value in row}
+    stored = {value: row[0] for value, row in row_of.items()}
+    return {
+        language: (
+            tuple(row[column] for row in rows),
+            {value: row[column] for value, row in row_of.items()},
+            stored
+        )
+        for language, column in (("he", 1), ("en", 2))
+    }
+
+# Gender is stored in English, HMO and tier in Hebrew (as the backend expects)
+_GENDER_CHOICES = _selection_choices((
+    ("Male", "זכר", "Male"),
+    ("Female", "נקבה", "Female")
+))
+_HMO_CHOICES = _selection_choices((
+    ("כללית", "כללית", "Clalit"),
+    ("מכבי", "מכבי", "Maccabi"),
+    ("מאוחדת", "מאוחדת", "Meuhedet"),
+    ("לאומית", "לאומית", "Leumit")
+))
+_TIER_CHOICES = _selection_choices((
+    ("זהב", "זהב", "Gold"),
+    ("כסף", "כסף", "Silver"),
+    ("ארד", "ארד", "Bronze")
+))
 
 class ProfileCollector:
     """Handle user profile collection workflow"""
@@ -18,6 +92,7 @@ class ProfileCollector:
     
     def render(self):
         """Render the profile collection interface"""
+        # Resolved once here and passed down to the helpers that need them
         language = self.session_manager.get_language()
         messages = MESSAGES[language]
         
@@ -25,24 +100,25 @@ class ProfileCollector:
         st.title(messages["profile_collection"])
         
         # Progress indicator
-        self._render_progress_indicator()
+        self._render_progress_indicator(language)
         
         # Backend status check
-        if not self._check_backend_connection():
+        if not self._check_backend_connection(language, messages):
             return
         
         # Main collection interface
-        self._render_collection_interface()
+        self._render_collection_interface(language, messages)
         
         # Profile summary sidebar
-        self._render_profile_summary()
+        self._render_profile_summary(language)
     
-    def _render_progress_indicator(self):
+    def _render_progress_indicator(self, language: str):
         """Display profile completion progress"""
+        # Count filled required fields straight off the profile's attributes (no dict copy);
+        # progress and completeness are derived from the same count
         profile = self.session_manager.get_user_profile()
-        progress = profile.get_completion_percentage()
-        
-        language = self.session_manager.get_language()
+        completed_required = sum(1 for field in REQUIRED_FIELDS if getattr(profile, field))
+        progress = completed_required * 100 // REQUIRED_FIELDS_COUNT
         
         if language == "he":
             progress_text = f"התקדמות: {progress}%"
@@ -55,42 +131,43 @@ class ProfileCollector:
         # Show required vs completed fields
         col1, col2 = st.columns(2)
         
-        profile_dict = profile.to_dict()
-        completed_required = sum(1 for field in REQUIRED_FIELDS if profile_dict.get(field))
-        
         with col1:
             if language == "he":
-                st.metric("שדות נדרשים", f"{completed_required}/{len(REQUIRED_FIELDS)}")
+                st.metric("שדות נדרשים", f"{completed_required}/{REQUIRED_FIELDS_COUNT}")
             else:
-                st.metric("Required Fields", f"{completed_required}/{len(REQUIRED_FIELDS)}")
+                st.metric("Required Fields", f"{completed_required}/{REQUIRED_FIELDS_COUNT}")
         
         with col2:
-            if profile.is_complete():
+            if completed_required == REQUIRED_FIELDS_COUNT:
                 if language == "he":
                     st.success("הפרופיל הושלם!")
                 else:
                     st.success("Profile Complete!")
     
-    def _check_backend_connection(self) -> bool:
+    def _check_backend_connection(self, language: str, messages: Mapping[str, str]) -> bool:
         """Check backend connection and show status"""
         from components.api_client import test_backend_connection
         
         if not test_backend_connection():
-            language = self.session_manager.get_language()
-            messages = MESSAGES[language]
-            
             st.error(messages["backend_error"])
             
             if st.button("🔄 Retry Connection" if language == "en" else "🔄 נסה שוב"):
+                test_backend_connection(force=True)
                 st.rerun()
             
             return False
         
         return True
     
-    def _render_collection_interface(self):
+    def _render_collection_interface(self, language: str, messages: Mapping[str, str]):
         """Render the main collection interface"""
-        language = self.session_manager.get_language()
+        # A response captured by the chat_input callback is sent here, under the spinner
+        pending_input = st.session_state.pop("pending_collection_input", None)
+        if pending_input:
+            self._process_user_input(pending_input)
+        
+        # Outcome of the last submission (chat input or the start button)
+        self._render_collection_feedback(language)
         
         # Check if we need to start or continue collection
         last_question = self.session_manager.get_last_llm_question()
@@ -105,28 +182,41 @@ class ProfileCollector:
         
         if not last_question and progress_pct > 0:
             # Ask backend for the next missing field without requiring the user to click Start again
-            success, response = send_profile_collection_request("", profile.to_dict())
-            if success:
-                updated_profile = response.get("user_profile", {})
-                if updated_profile:
-                    self.session_manager.update_user_profile(updated_profile)
-                llm_question = response.get("next_question", "")
-                if llm_question:
-                    self.session_manager.set_last_llm_question(llm_question)
-                    last_question = llm_question
-            # even if it fails, continue with default flow
+            # (even if it fails, continue with default flow)
+            last_question = self._fetch_next_question_once()
         
         if not last_question:
             # Start collection process
-            self._start_collection()
+            self._start_collection(language, messages)
         else:
             # Continue with existing question
-            self._continue_collection(last_question)
+            self._continue_collection(last_question, language, messages)
     
-    def _start_collection(self):
+    def _fetch_next_question_once(self) -> str:
+        """
+        Ask the backend for the next question for the current profile.
+        Runs at most once until the next question arrives, so reruns without a
+        pending question (e.g. after completion) don't each cost a backend round-trip.
+        """
+        if st.session_state.get("next_question_fetched", False):
+            return ""
+        st.session_state.next_question_fetched = True
+        
+        profile = self.session_manager.get_user_profile()
+        success, response = send_profile_collection_request("", profile.to_dict())
+        if not success:
+            return ""
+        
+        updated_profile = response.get("user_profile", {})
+        if updated_profile:
+            self.session_manager.update_user_profile(updated_profile)
+        llm_question = response.get("next_question", "")
+        if llm_question:
+            self.session_manager.set_last_llm_question(llm_question)
+        return llm_question
+    
+    def _start_collection(self, language: str, messages: Mapping[str, str]):
         """Start the profile collection process"""
-        language = self.session_manager.get_language()
-
         # If the user already made progress, skip the start panel and
         # immediately fetch/continue with the next question to avoid resets.
         profile = self.session_manager.get_user_profile()
@@ -135,186 +225,162 @@ class ProfileCollector:
         except Exception:
             progress_pct = 0
         if progress_pct > 0:
-            success, response = send_profile_collection_request("", profile.to_dict())
-            if success:
-                updated_profile = response.get("user_profile", {})
-                if updated_profile:
-                    self.session_manager.update_user_profile(updated_profile)
-                llm_question = response.get("next_question", "")
-                if llm_question:
-                    self.session_manager.set_last_llm_question(llm_question)
-                    self._continue_collection(llm_question)
-                    return
+            llm_question = self._fetch_next_question_once()
+            if llm_question:
+                self._continue_collection(llm_question, language, messages)
+                return
         
-        if language == "he":
-            welcome_msg = "🏥 ברוכים הבאים למערכת הבריאות החכמה!"
-            subtitle_msg = "המערכת תעזור לך להירשם ולקבל מידע רפואי מותאם אישית"
-            instruction_msg = "👇 לחץ על הכפתור כדי להתחיל"
-            start_text = "🚀 התחל רישום"
-        else:
-            welcome_msg = "🏥 Welcome to the Smart Health System!"
-            subtitle_msg = "This system will help you register and get personalized medical information"
-            instruction_msg = "👇 Click the button below to get started"
-            start_text = "🚀 Let's start"
+        texts = _COLLECTION_TEXTS[language]
         
         # Welcome section
-        st.markdown(f"### {welcome_msg}")
-        st.markdown(f"*{subtitle_msg}*")
+        st.markdown(f"### {texts['welcome']}")
+        st.markdown(f"*{texts['subtitle']}*")
         st.markdown("---")
         
         # Big, obvious instruction
-        if language == "he":
-            st.markdown(f'<h2 style="text-align: center; direction: rtl;">{instruction_msg}</h2>', unsafe_allow_html=True)
-        else:
-            st.markdown(f'<h2 style="text-align: center;">{instruction_msg}</h2>', unsafe_allow_html=True)
+        st.markdown(texts["instruction_html"], unsafe_allow_html=True)
         
         # Centered, large button
         col1, col2, col3 = st.columns([1, 1, 1])
         with col2:
-            if st.button(start_text, key="start_registration", type="primary", use_container_width=True):
+            if st.button(texts["start"], key="start_registration", type="primary", use_container_width=True):
                 # Send initial request to backend
-                initial_input = "Hi, I want to register" if language == "en" else "שלום, אני רוצה להירשם"
-                self._process_user_input(initial_input)
+                self._process_user_input(texts["initial_input"])
         
         # Additional info
         st.markdown("---")
-        if language == "he":
-            st.info("💡 המערכת תשאל אותך שאלות כדי לאסוף את הפרטים הנחוצים לרישום", icon="ℹ️")
-        else:
-            st.info("💡 The system will ask you questions to collect the necessary information for registration", icon="ℹ️")
+        st.info(texts["info"], icon="ℹ️")
     
-    def _continue_collection(self, llm_question: str):
+    def _continue_collection(self, llm_question: str, language: str, messages: Mapping[str, str]):
         """Continue collection with existing LLM question"""
-        language = self.session_manager.get_language()
-        
         # Display current LLM question in a chat-like format
         with st.chat_message("assistant"):
-            st.write(wrap_rtl_content(llm_question) if is_rtl_text(llm_question) else llm_question, 
-                    unsafe_allow_html=True)
-        
-        # User input - use chat_input for better UX
-        if language == "he":
-            placeholder = "הקלד את תגובתך כאן..."
-        else:
-            placeholder = "Type your response here..."
+            st.write(_rtl_wrap(llm_question), unsafe_allow_html=True)
         
-        user_input = st.chat_input(placeholder)
-        
-        if user_input and user_input.strip():
-            # Show user message
-            with st.chat_message("user"):
-                st.write(user_input)
-            
-            # Process the input
-            self._process_user_input(user_input.strip())
+        # User input - use chat_input for better UX. The callback only captures the
+        # submission; the rerun it triggers sends it (see _render_collection_interface)
+        st.chat_input(
+            _COLLECTION_TEXTS[language]["input_placeholder"],
+            key="collection_input",
+            on_submit=self._submit_collection_input
+        )
         
         # Show profile completion status
         profile = self.session_manager.get_user_profile()
         if profile.is_complete():
-            self._render_completion_options()
+            self._render_completion_options(language, messages)
+    
+    def _submit_collection_input(self):
+        """chat_input callback: capture the submitted response for the script body to send"""
+        user_input = (st.session_state.get("collection_input") or "").strip()
+        if user_input:
+            st.session_state.pending_collection_input = user_input
     
     def _process_user_input(self, user_input: str):
-        """Process user input through backend"""
-        profile = self.session_manager.get_user_profile()
+        """Process user input through backend from the script body"""
+        language = self.session_manager.get_language()
         
-        # Debug: Show what we're sending
-        if self.session_manager.get_debug_mode():
-            st.write("**Debug - Sending to backend:**")
-            st.write(f"User input: {user_input}")
-            st.write(f"Profile: {profile.to_dict()}")
+        with st.spinner(_COLLECTION_TEXTS[language]["processing"]):
+            success = self._send_user_input(user_input)
         
-        with st.spinner("Processing..." if self.session_manager.get_language() == "en" else "מעבד..."):
-            success, response = send_profile_collection_request(user_input, profile.to_dict())
-            
-            # Debug: Show response
-            if self.session_manager.get_debug_mode():
-                st.write("**Debug - Backend response:**")
-                st.write(f"Success: {success}")
-                st.json(response)
-            
-            if success:
-                # Update profile with the returned user_profile from backend
-                updated_profile = response.get("user_profile", {})
-                if updated_profile:
-                    self.session_manager.update_user_profile(updated_profile)
-                
-                # Update LLM question for next interaction
-                llm_question = response.get("next_question", "")
-                self.session_manager.set_last_llm_question(llm_question)
-                
-                # Check if collection is complete (when status is "complete" or profile is confirmed)
-                status = response.get("status", "")
-                if status == "complete" or updated_profile.get("confirmed", False):
-                    self._handle_collection_complete()
-                
-                st.rerun()
-            
-            else:
-                # Handle API error
-                from components.api_client import api_client
-                error_msg = api_client.handle_api_error(response, self.session_manager.get_language())
-                st.error(error_msg)
-                
-                # Show debug info if available
-                if self.session_manager.get_debug_mode():
-                    st.write("**Debug - Error Details:**")
-                    st.json(response)
+        if success:
+            st.rerun()
+        self._render_collection_feedback(language)
     
-    def _handle_collection_complete(self):
-        """Handle completion of profile collection"""
-        language = self.session_manager.get_language()
+    def _send_user_input(self, user_input: str) -> bool:
+        """
+        Send user input to the backend and update the profile and pending question.
+        Renders nothing; the outcome is kept in st.session_state.collection_feedback
+        for _render_collection_feedback, so it survives the rerun that follows.
+        """
+        profile_data = self.session_manager.get_user_profile().to_dict()
+        success, response = send_profile_collection_request(user_input, profile_data)
+        complete = False
+        
+        if success:
+            # Update profile with the returned user_profile from backend
+            updated_profile = response.get("user_profile", {})
+            if updated_profile:
+                self.session_manager.update_user_profile(updated_profile)
+            
+            # Update LLM question for next interaction
+            llm_question = response.get("next_question", "")
+            self.session_manager.set_last_llm_question(llm_question)
+            
+            # Check if collection is complete (when status is "complete" or profile is confirmed)
+            status = response.get("status", "")
+            if status == "complete" or updated_profile.get("confirmed", False):
+                complete = True
+                # Clear the LLM question to show completion state
+                self.session_manager.set_last_llm_question("")
+        
+        st.session_state.collection_feedback = {
+            "user_input": user_input,
+            "profile": profile_data,
+            "success": success,
+            "response": response,
+            "complete": complete
+        }
+        return success
+    
+    def _render_collection_feedback(self, language: str):
+        """Render the outcome of the last submission (once) and its debug details"""
+        feedback = st.session_state.pop("collection_feedback", None)
+        if feedback is None:
+            return
+        debug = self.session_manager.get_debug_mode()
+        response = feedback["response"]
         
-        if language == "he":
-            st.success("איסוף הפרטים הושלם בהצלחה!")
-        else:
-            st.success("Profile collection completed successfully!")
+        # Debug: Show what was sent and what came back
+        if debug:
+            st.write("**Debug - Sending to backend:**")
+            st.write(f"User input: {feedback['user_input']}")
+            st.write(f"Profile: {feedback['profile']}")
+            st.write("**Debug - Backend response:**")
+            st.write(f"Success: {feedback['success']}")
+            st.json(response)
         
-        # Clear the LLM question to show completion state
-        self.session_manager.set_last_llm_question("")
+        if feedback["success"]:
+            if feedback["complete"]:
+                st.success(_COLLECTION_TEXTS[language]["collection_complete"])
+        
+        else:
+            # Handle API error
+            from components.api_client import api_client
+            error_msg = api_client.handle_api_error(response, language)
+            st.error(error_msg)
     
-    def _render_completion_options(self):
+    def _render_completion_options(self, language: str, messages: Mapping[str, str]):
         """Render options when profile collection is complete"""
-        language = self.session_manager.get_language()
-        messages = MESSAGES[language]
+        texts = _COLLECTION_TEXTS[language]
         
         st.divider()
         
-        if language == "he":
-            st.write("**הפרופיל שלך הושלם! מה תרצה לעשות עכשיו?**")
-        else:
-            st.write("**Your profile is complete! What would you like to do now?**")
+        st.write(texts["completion_prompt"])
         
-        col1, col2, col3 = st.columns(3)
+        # One form so the choice is submitted in a single rerun
+        with st.form("completion_options"):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                start_chat = st.form_submit_button(messages["start_chat"])
+            with col2:
+                review = st.form_submit_button(texts["review"])
+            with col3:
+                edit = st.form_submit_button(texts["edit"])
         
-        with col1:
-            if st.button(messages["start_chat"]):
-                if self.session_manager.transition_to_chat():
-                    st.rerun()
-        
-        with col2:
-            if language == "he":
-                review_text = "סקור פרטים"
-            else:
-                review_text = "Review Details"
-            
-            if st.button(review_text):
-                st.session_state.show_profile_summary = True
+        if start_chat:
+            if self.session_manager.transition_to_chat():
                 st.rerun()
-        
-        with col3:
-            if language == "he":
-                edit_text = "ערוך פרטים"
-            else:
-                edit_text = "Edit Details"
-            
-            if st.button(edit_text):
-                self._render_manual_edit_form()
+        elif review:
+            st.session_state.show_profile_summary = True
+            st.rerun()
+        elif edit:
+            # Rendered outside the options form (Streamlit forms can't be nested)
+            self._render_manual_edit_form(language)
     
-    def _render_profile_summary(self):
+    def _render_profile_summary(self, language: str):
         """Render profile summary in sidebar"""
         with st.sidebar:
-            language = self.session_manager.get_language()
-            
             if language == "he":
                 st.subheader("סיכום פרופיל")
             else:
@@ -338,10 +404,12 @@ class ProfileCollector:
                 debug_data = self.session_manager.export_session_data()
                 st.json(debug_data)
     
-    def _render_manual_edit_form(self):
+    # A fragment reruns on its own: submitting the form re-renders just this form
+    # (and still sees the submit), instead of the whole page where the "Edit
+    # Details" click that opened it is no longer set
+    @st.fragment
+    def _render_manual_edit_form(self, language: str):
         """Render manual profile editing form"""
-        language = self.session_manager.get_language()
-        
         st.divider()
         
         if language == "he":
@@ -351,148 +419,30 @@ class ProfileCollector:
         
         profile = self.session_manager.get_user_profile()
         
+        # Shallow copy of the current values
+        current_values = profile.to_dict()
+        
         with st.form("manual_edit_form"):
-            # Create input fields for all profile fields
-            updated_data = {}
-            
-            field_labels = {
-                "first_name": "שם פרטי" if language == "he" else "First Name",
-                "last_name": "שם משפחה" if language == "he" else "Last Name",
-                "id_number": "תעודת זהות" if language == "he" else "ID Number",
-                "gender": "מין" if language == "he" else "Gender",
-                "age": "גיל" if language == "he" else "Age",
-                "hmo": "קופת חולים" if language == "he" else "HMO",
-                "hmo_card_number": "מספר כרטיס" if language == "he" else "Card Number",
-                "membership_tier": "דרגת חברות" if language == "he" else "Membership Tier",
-                "phone_number": "טלפון" if language == "he" else "Phone",
-                "email": "אימייל" if language == "he" else "Email"
-            }
-            
-            # Create text inputs for fields that should be text inputs
-            text_input_fields = ["first_name", "last_name", "id_number", "age", "hmo_card_number", "phone_number", "email"]
-            
-            for field in text_input_fields:
-                if field in field_labels:
-                    current_value = getattr(profile, field, "")
-                    updated_data[field] = st.text_input(field_labels[field], value=current_value, key=f"edit_{field}")
+            field_labels = FIELD_LABELS[language]
             
-            # Gender selection
-            gender_options = ["זכר", "נקבה"] if language == "he" else ["Male", "Female"]
-            current_gender = getattr(profile, "gender", "")
-            
-            # Map current gender to display options
-            gender_mapping = {
-                "Male": "זכר" if language == "he" else "Male",
-                "Female": "נקבה" if language == "he" else "Female",
-                "זכר": "זכר" if language == "he" else "Male",
-                "נקבה": "נקבה" if language == "he" else "Female"
-            }
-            
-            # Find the display value for current gender
-            display_gender = gender_mapping.get(current_gender, current_gender)
-            
-            if display_gender in gender_options:
-                gender_index = gender_options.index(display_gender)
-            else:
-                gender_index = 0
-            
-            selected_gender = st.selectbox(
-                field_labels["gender"], 
-                gender_options, 
-                index=gender_index,
-                key="edit_gender_select"
-            )
-            
-            # Map selected gender back to internal format
-            reverse_mapping = {
-                "זכר": "Male",
-                "נקבה": "Female",
-                "Male": "Male",
-                "Female": "Female"
+            # Create input fields for all profile fields, text inputs first
+            updated_data = {
+                field: st.text_input(field_labels[field], value=current_values.get(field, ""), key=f"edit_{field}")
+                for field in _TEXT_INPUT_FIELDS
             }
-            updated_data["gender"] = reverse_mapping.get(selected_gender, selected_gender)
-            
-            # HMO selection
-            hmo_options = ["כללית", "מכבי", "מאוחדת", "לאומית"] if language == "he" else ["Clalit", "Maccabi", "Meuhedet", "Leumit"]
-            current_hmo = getattr(profile, "hmo", "")
-            
-            # Map current HMO to display options
-            hmo_mapping = {
-                "כללית": "כללית" if language == "he" else "Clalit",
-                "מכבי": "מכבי" if language == "he" else "Maccabi",
-                "מאוחדת": "מאוחדת" if language == "he" else "Meuhedet",
-                "לאומית": "לאומית" if language == "he" else "Leumit",
-                "Clalit": "כללית" if language == "he" else "Clalit",
-                "Maccabi": "מכבי" if language == "he" else "Maccabi",
-                "Meuhedet": "מאוחדת" if language == "he" else "Meuhedet",
-                "Leumit": "לאומית" if language == "he" else "Leumit"
-            }
-            
-            display_hmo = hmo_mapping.get(current_hmo, current_hmo)
-            
-            if display_hmo in hmo_options:
-                hmo_index = hmo_options.index(display_hmo)
-            else:
-                hmo_index = 0
             
-            selected_hmo = st.selectbox(
-                field_labels["hmo"],
-                hmo_options,
-                index=hmo_index,
-                key="edit_hmo_select"
-            )
-            
-            # Map selected HMO back to internal format
-            hmo_reverse_mapping = {
-                "כללית": "כללית",
-                "מכבי": "מכבי", 
-                "מאוחדת": "מאוחדת",
-                "לאומית": "לאומית",
-                "Clalit": "כללית",
-                "Maccabi": "מכבי",
-                "Meuhedet": "מאוחדת",
-                "Leumit": "לאומית"
-            }
-            updated_data["hmo"] = hmo_reverse_mapping.get(selected_hmo, selected_hmo)
-            
-            # Membership tier selection
-            tier_options = ["זהב", "כסף", "ארד"] if language == "he" else ["Gold", "Silver", "Bronze"]
-            current_tier = getattr(profile, "membership_tier", "")
-            
-            # Map current tier to display options
-            tier_mapping = {
-                "זהב": "זהב" if language == "he" else "Gold",
-                "כסף": "כסף" if language == "he" else "Silver", 
-                "ארד": "ארד" if language == "he" else "Bronze",
-                "Gold": "זהב" if language == "he" else "Gold",
-                "Silver": "כסף" if language == "he" else "Silver",
-                "Bronze": "ארד" if language == "he" else "Bronze"
-            }
-            
-            display_tier = tier_mapping.get(current_tier, current_tier)
-            
-            if display_tier in tier_options:
-                tier_index = tier_options.index(display_tier)
-            else:
-                tier_index = 0
-            
-            selected_tier = st.selectbox(
-                field_labels["membership_tier"],
-                tier_options,
-                index=tier_index,
-                key="edit_tier_select"
-            )
-            
-            # Map selected tier back to internal format
-            tier_reverse_mapping = {
-                "זהב": "זהב",
-                "כסף": "כסף",
-                "ארד": "ארד",
-                "Gold": "זהב",
-                "Silver": "כסף", 
-                "Bronze": "ארד"
-            }
-            updated_data["membership_tier"] = tier_reverse_mapping.get(selected_tier, selected_tier)
+            # Selections are stored in one canonical form and displayed in the UI language
+            for field, key, (options, display_mapping, stored_mapping) in (
+                ("gender", "edit_gender_select", _GENDER_CHOICES[language]),
+                ("hmo", "edit_hmo_select", _HMO_CHOICES[language]),
+                ("membership_tier", "edit_tier_select", _TIER_CHOICES[language])
+            ):
+                current_value = current_values.get(field, "")
+                display_value = display_mapping.get(current_value, current_value)
+                index = options.index(display_value) if display_value in options else 0
+                
+                selected = st.selectbox(field_labels[field], options, index=index, key=key)
+                updated_data[field] = stored_mapping.get(selected, selected)
             
             # Submit button
             submit_text = "שמור שינויים" if language == "he" else "Save Changes"
@@ -1,12 +1,15 @@
 """
 Session state management for Streamlit application
 """
+import time
 import streamlit as st
 from typing import Dict, Any, List, Optional
-from dataclasses import dataclass, field, asdict
-from config.settings import PHASE_LANGUAGE_SELECTION, PHASE_COLLECTION, PHASE_CHAT, BACKEND_BASE_URL, REQUIRED_FIELDS
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field, fields
+from utils.hebrew_support import is_rtl_text, wrap_rtl_content
+from config.settings import PHASE_LANGUAGE_SELECTION, PHASE_COLLECTION, PHASE_CHAT, BACKEND_BASE_URL, REQUIRED_FIELDS, REQUIRED_FIELDS_COUNT, MAX_CHAT_MESSAGES
 
-@dataclass
+@dataclass(slots=True)
 class UserProfile:
     """User profile data structure"""
     first_name: str = ""
@@ -25,24 +28,32 @@ class UserProfile:
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary with proper null handling"""
-        data = asdict(self)
+        # Shallow: every field is a scalar, so asdict's deep copy buys nothing
+        data = {name: getattr(self, name) for name in PROFILE_FIELDS}
         # Convert empty strings to None for optional integer fields
-        if data.get('age') == "" or data.get('age') == "":
+        # (the manual edit form stores age as the text typed)
+        if data['age'] == "":
             data['age'] = None
         return data
     
     def is_complete(self) -> bool:
         """Check if all required fields are filled"""
-        profile_dict = self.to_dict()
-        return all(profile_dict.get(field, "") for field in REQUIRED_FIELDS)
+        return all(getattr(self, name) for name in REQUIRED_FIELDS)
     
     def get_completion_percentage(self) -> int:
         """Get completion percentage for required fields"""
-        profile_dict = self.to_dict()
-        completed = sum(1 for field in REQUIRED_FIELDS if profile_dict.get(field, ""))
-        return int((completed / len(REQUIRED_FIELDS)) * 100)
+        # Plain loop: cheaper than sum() over a generator for this few fields
+        completed = 0
+        for name in REQUIRED_FIELDS:
+            if getattr(self, name):
+                completed += 1
+        return completed * 100 // REQUIRED_FIELDS_COUNT
 
-@dataclass
+# UserProfile field names, in declaration order (resolved once; fields() rebuilds
+# its tuple on every call)
+PROFILE_FIELDS = tuple(f.name for f in fields(UserProfile))
+
+@dataclass(slots=True)
 class ChatMessage:
     """Chat message data structure"""
     content: str
@@ -50,18 +61,28 @@ class ChatMessage:
     timestamp: str = ""
     sources: List[str] = field(default_factory=list)
     debug_info: Dict[str, Any] = field(default_factory=dict)
+    # Derived once from content and reused on every rerun
+    # (slots leave no instance __dict__ for cached_property)
+    is_rtl: bool = field(init=False, repr=False, compare=False)
+    display_content: str = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self.is_rtl = is_rtl_text(self.content)
+        # Content as rendered in the chat, RTL-wrapped when needed
+        self.display_content = wrap_rtl_content(self.content) if self.is_rtl else self.content
 
 class SessionManager:
     """Manage Streamlit session state"""
     
     @staticmethod
     def initialize_session():
-        """Initialize session state with default values"""
+        """Initialize session state with default values (once per run, from main(), before any accessor)"""
         if "initialized" not in st.session_state:
             st.session_state.initialized = True
             st.session_state.current_phase = PHASE_LANGUAGE_SELECTION
             st.session_state.user_profile = UserProfile()
-            st.session_state.conversation_history = []
+            st.session_state.conversation_history = deque(maxlen=MAX_CHAT_MESSAGES)
+            st.session_state.conversation_history_pairs = []
             st.session_state.backend_url = BACKEND_BASE_URL
             st.session_state.language = "he"  # Default to Hebrew
             st.session_state.debug_mode = False
@@ -73,32 +94,27 @@ class SessionManager:
     @staticmethod
     def get_user_profile() -> UserProfile:
         """Get current user profile"""
-        SessionManager.initialize_session()
         return st.session_state.user_profile
     
     @staticmethod
     def update_user_profile(updates: Dict[str, Any]):
         """Update user profile with new data"""
-        SessionManager.initialize_session()
         profile = st.session_state.user_profile
         
-        for field, value in updates.items():
-            if hasattr(profile, field):
-                setattr(profile, field, value)
+        for name, value in updates.items():
+            if hasattr(profile, name):
+                setattr(profile, name, value)
         
         st.session_state.user_profile = profile
     
     @staticmethod
-    def get_conversation_history() -> List[ChatMessage]:
+    def get_conversation_history() -> "deque[ChatMessage]":
         """Get conversation history"""
-        SessionManager.initialize_session()
         return st.session_state.conversation_history
     
     @staticmethod
     def add_chat_message(content: str, is_user: bool, sources: List[str] = None, debug_info: Dict[str, Any] = None):
         """Add message to conversation history"""
-        SessionManager.initialize_session()
-        
         message = ChatMessage(
             content=content,
             is_user=is_user,
@@ -107,29 +123,52 @@ class SessionManager:
         )
         
         st.session_state.conversation_history.append(message)
+        
+        # Keep the backend's {"user", "assistant"} exchange list in step with the messages
+        pairs = SessionManager.get_conversation_pairs()
+        if is_user:
+            pairs.append({"user": content, "assistant": ""})
+        elif pairs:
+            pairs[-1]["assistant"] = content
+        else:
+            pairs.append({"user": "", "assistant": content})
+        # Capped like the messages (at most one exchange per two messages)
+        if len(pairs) > MAX_CHAT_MESSAGES // 2:
+            del pairs[0]
+    
+    @staticmethod
+    def get_conversation_pairs() -> List[Dict[str, str]]:
+        """Get conversation history as user/assistant exchanges, in the format the backend expects"""
+        if "conversation_history_pairs" not in st.session_state:
+            st.session_state.conversation_history_pairs = []
+        return st.session_state.conversation_history_pairs
+    
+    @staticmethod
+    def get_chat_cache() -> "OrderedDict[tuple, Dict[str, Any]]":
+        """Get this session's cache of answered chat requests"""
+        if "chat_cache" not in st.session_state:
+            st.session_state.chat_cache = OrderedDict()
+        return st.session_state.chat_cache
     
     @staticmethod
     def clear_conversation():
         """Clear conversation history"""
-        SessionManager.initialize_session()
-        st.session_state.conversation_history = []
+        st.session_state.conversation_history = deque(maxlen=MAX_CHAT_MESSAGES)
+        st.session_state.conversation_history_pairs = []
     
     @staticmethod
     def get_current_phase() -> str:
         """Get current application phase"""
-        SessionManager.initialize_session()
         return st.session_state.current_phase
     
     @staticmethod
     def set_phase(phase: str):
         """Set current application phase"""
-        SessionManager.initialize_session()
         st.session_state.current_phase = phase
     
     @staticmethod
     def transition_to_chat():
         """Transition from profile collection to chat phase"""
-        SessionManager.initialize_session()
         profile = st.session_state.user_profile
         
         if profile.is_complete():
@@ -141,94 +180,87 @@ class SessionManager:
     @staticmethod
     def get_language() -> str:
         """Get current language setting"""
-        SessionManager.initialize_session()
         return st.session_state.language
     
     @staticmethod
     def set_language(language: str):
         """Set language preference"""
-        SessionManager.initialize_session()
         st.session_state.language = language
     
     @staticmethod
     def toggle_language():
         """Toggle between Hebrew and English"""
-        SessionManager.initialize_session()
         current = st.session_state.language
         st.session_state.language = "en" if current == "he" else "he"
     
     @staticmethod
     def get_debug_mode() -> bool:
         """Get debug mode status"""
-        SessionManager.initialize_session()
         return st.session_state.debug_mode
     
     @staticmethod
     def toggle_debug_mode():
         """Toggle debug mode"""
-        SessionManager.initialize_session()
         st.session_state.debug_mode = not st.session_state.debug_mode
     
     @staticmethod
     def get_backend_url() -> str:
         """Get backend URL"""
-        SessionManager.initialize_session()
         return st.session_state.backend_url
     
     @staticmethod
     def set_backend_url(url: str):
         """Set backend URL"""
-        SessionManager.initialize_session()
         st.session_state.backend_url = url
     
     @staticmethod
     def get_backend_status() -> Optional[bool]:
         """Get backend connection status"""
-        SessionManager.initialize_session()
         return st.session_state.backend_connected
     
     @staticmethod
     def set_backend_status(connected: bool):
         """Set backend connection status"""
-        SessionManager.initialize_session()
         st.session_state.backend_connected = connected
+        st.session_state.backend_status_time = time.monotonic()
+    
+    @staticmethod
+    def get_backend_status_age() -> float:
+        """Seconds since the backend status was last set"""
+        return time.monotonic() - st.session_state.get("backend_status_time", float("-inf"))
     
     @staticmethod
     def reset_session():
         """Reset entire session state"""
-        for key in list(st.session_state.keys()):
-            del st.session_state[key]
+        st.session_state.clear()
         SessionManager.initialize_session()
     
     @staticmethod
     def get_profile_collection_step() -> int:
         """Get current profile collection step"""
-        SessionManager.initialize_session()
         return st.session_state.profile_collection_step
     
     @staticmethod
     def increment_profile_step():
         """Increment profile collection step"""
-        SessionManager.initialize_session()
         st.session_state.profile_collection_step += 1
     
     @staticmethod
     def get_last_llm_question() -> str:
         """Get last LLM question"""
-        SessionManager.initialize_session()
         return st.session_state.last_llm_question
     
     @staticmethod
     def set_last_llm_question(question: str):
         """Set last LLM question"""
-        SessionManager.initialize_session()
         st.session_state.last_llm_question = question
+        if question:
+            # A real question arrived; if it is cleared later, one proactive fetch may run again
+            st.session_state.next_question_fetched = False
     
     @staticmethod
     def export_session_data() -> Dict[str, Any]:
         """Export session data for debugging"""
-        SessionManager.initialize_session()
-        
         return {
             "current_phase": st.session_state.current_phase,
             "user_profile": st.session_state.user_profile.to_dict(),
@@ -2,6 +2,7 @@
 Frontend configuration and constants
 """
 import os
+from types import MappingProxyType
 from typing import Dict, List
 
 # Backend Integration
@@ -10,10 +11,18 @@ BACKEND_BASE_URL = os.getenv("BACKEND_URL", "http://127.0.0.1:8001")
 ENDPOINTS = {
     "collect_user_info": "/collect_user_info",
     "chat": "/chat", 
+    "chat_stream": "/chat/stream",
     "health": "/health",
     "kb_stats": "/kb_stats"
 }
 
+# Past exchanges sent with each chat request (the backend prompt uses the last 3)
+CHAT_HISTORY_WINDOW = 3
+
+# Chat messages kept in the session (oldest dropped first); the displayed
+# conversation is capped so session state can't grow without bound
+MAX_CHAT_MESSAGES = 200
+
 # UI Constants
 PHASE_LANGUAGE_SELECTION = "language_selection"
 PHASE_COLLECTION = "profile_collection"
@@ -32,6 +41,8 @@ REQUIRED_FIELDS = [
     "hmo_card_number", 
     "membership_tier"
 ]
+REQUIRED_FIELDS_SET = frozenset(REQUIRED_FIELDS)
+REQUIRED_FIELDS_COUNT = len(REQUIRED_FIELDS)
 
 # Optional profile fields
 OPTIONAL_FIELDS = [
@@ -41,27 +52,88 @@ OPTIONAL_FIELDS = [
     "emergency_contact"
 ]
 
+# Profile field labels, per language (sidebar summary, edit form, Hebrew field rows)
+FIELD_LABELS_HE = MappingProxyType({
+    "first_name": "שם פרטי",
+    "last_name": "שם משפחה",
+    "id_number": "תעודת זהות",
+    "gender": "מין",
+    "age": "גיל",
+    "hmo": "קופת חולים",
+    "hmo_card_number": "מספר כרטיס",
+    "membership_tier": "דרגת חברות",
+    "phone_number": "טלפון",
+    "email": "אימייל",
+    "address": "כתובת",
+    "emergency_contact": "איש קשר לחירום"
+})
+
+FIELD_LABELS_EN = MappingProxyType({
+    "first_name": "First Name",
+    "last_name": "Last Name",
+    "id_number": "ID Number",
+    "gender": "Gender",
+    "age": "Age",
+    "hmo": "HMO",
+    "hmo_card_number": "Card Number",
+    "membership_tier": "Membership Tier",
+    "phone_number": "Phone",
+    "email": "Email",
+    "address": "Address",
+    "emergency_contact": "Emergency Contact"
+})
+
+FIELD_LABELS = MappingProxyType({"he": FIELD_LABELS_HE, "en": FIELD_LABELS_EN})
+
 # UI Messages
-MESSAGES = {
-    "he": {
-        "welcome": "ברוכים הבאים למערכת הבריאות החכמה",
-        "profile_collection": "איסוף פרטי משתמש",
-        "chat_phase": "שאלות ותשובות רפואיות",
-        "profile_complete": "הפרופיל הושלם בהצלחה",
-        "start_chat": "התחל צ'אט",
-        "backend_error": "שגיאה בחיבור לשרת",
-        "validation_error": "שגיאה בוולידציה"
-    },
-    "en": {
-        "welcome": "Welcome to Smart Health System",
-        "profile_collection": "User Profile Collection", 
-        "chat_phase": "Medical Q&A",
-        "profile_complete": "Profile completed successfully",
-        "start_chat": "Start Chat",
-        "backend_error": "Backend connection error",
-        "validation_error": "Validation error"
-    }
-}
+# Read-only so the per-language tables can be shared module-wide
+MESSAGES_HE = MappingProxyType({
+    "welcome": "ברוכים הבאים למערכת הבריאות החכמה",
+    "profile_collection": "איסוף פרטי משתמש",
+    "chat_phase": "שאלות ותשובות רפואיות",
+    "profile_complete": "הפרופיל הושלם בהצלחה",
+    "start_chat": "התחל צ'אט",
+    "backend_error": "שגיאה בחיבור לשרת",
+    "validation_error": "שגיאה בוולידציה",
+    "app_title": "🏥 מערכת הבריאות החכמה",
+    "phase_collection_banner": "שלב 1: איסוף פרטי משתמש",
+    "phase_chat_banner": "💬 שלב 2: שאלות ותשובות רפואיות",
+    "backend_connected": "🟢 ברוכים הבאים!",
+    "backend_disconnected": "🔴 שרת מנותק",
+    "backend_pending": "🟡נא להמתין כבר מתחילים...",
+    "reconnect": "נסה להתחבר שוב",
+    "nav_back": "🔙 חזור לעריכת פרופיל",
+    "footer_caption": "מערכת הבריאות החכמה",
+    "footer_reset": "🔄 איפוס מערכת",
+    "reset_confirm": "האם אתה בטוח שברצונך לאפס?",
+    "system_error": "שגיאה במערכת",
+    "error_reset": "איפוס מערכת"
+})
+
+MESSAGES_EN = MappingProxyType({
+    "welcome": "Welcome to Smart Health System",
+    "profile_collection": "User Profile Collection", 
+    "chat_phase": "Medical Q&A",
+    "profile_complete": "Profile completed successfully",
+    "start_chat": "Start Chat",
+    "backend_error": "Backend connection error",
+    "validation_error": "Validation error",
+    "app_title": "🏥 Smart Health System",
+    "phase_collection_banner": "Phase 1: User Profile Collection",
+    "phase_chat_banner": "Phase 2: Medical Q&A",
+    "backend_connected": "Welcome!",
+    "backend_disconnected": "🔴 Backend Disconnected",
+    "backend_pending": "Getting Started...",
+    "reconnect": "Try to Reconnect",
+    "nav_back": "🔙 Back to Profile",
+    "footer_caption": "Smart Health System",
+    "footer_reset": "🔄 Reset System",
+    "reset_confirm": "Are you sure you want to reset?",
+    "system_error": "System Error",
+    "error_reset": "Reset System"
+})
+
+MESSAGES = MappingProxyType({"he": MESSAGES_HE, "en": MESSAGES_EN})
 
 # Styling
 CSS_CLASSES = {
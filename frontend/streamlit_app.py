@@ -5,6 +5,7 @@ Smart Health System Frontend
 import streamlit as st
 import os
 from pathlib import Path
+from typing import Mapping, Optional
 
 # Add the current directory to Python path for imports
 import sys
@@ -13,19 +14,48 @@ sys.path.insert(0, str(current_dir))
 
 from components.session_manager import SessionManager
 from components.language_selector import LanguageSelector
-from components.profile_collector import ProfileCollector
-from components.chat_interface import ChatInterface
-from config.settings import PHASE_LANGUAGE_SELECTION, PHASE_COLLECTION, PHASE_CHAT, MESSAGES
+from config.settings import PHASE_LANGUAGE_SELECTION, PHASE_COLLECTION, PHASE_CHAT, MESSAGES, MESSAGES_HE, MESSAGES_EN
 from utils.hebrew_support import get_language_toggle_text
 
+# Hebrew banners are RTL HTML blocks (English ones use Streamlit's alert elements);
+# built once at import instead of on every rerun
+_RTL_BANNER_STYLE = "direction: rtl; text-align: right; color: {color}; background-color: {background}; {extra}"
+_PHASE_BANNER_STYLE = _RTL_BANNER_STYLE.format(
+    color="#000000", background="#e1f5fe",
+    extra="padding: 10px; border-radius: 5px; border-left: 4px solid #01579b; margin-top: 10px;"
+)
+_HE_BANNERS = {
+    key: f'<div style="{style}">{MESSAGES_HE[key]}</div>'
+    for key, style in (
+        ("phase_collection_banner", _PHASE_BANNER_STYLE),
+        ("phase_chat_banner", _PHASE_BANNER_STYLE),
+        ("backend_connected", _RTL_BANNER_STYLE.format(
+            color="#155724", background="#d4edda",
+            extra="padding: 12px; border-radius: 4px; border: 1px solid #c3e6cb;")),
+        ("backend_disconnected", _RTL_BANNER_STYLE.format(
+            color="#721c24", background="#f8d7da",
+            extra="padding: 12px; border-radius: 4px; border: 1px solid #f5c6cb;")),
+        ("backend_pending", _RTL_BANNER_STYLE.format(
+            color="#856404", background="#fff3cd",
+            extra="padding: 12px; border-radius: 4px; border: 1px solid #ffeaa7; margin-bottom: 15px;"))
+    )
+}
+
+@st.cache_data
+def _read_css() -> Optional[str]:
+    """Read the stylesheet once per process instead of on every rerun (None if missing)"""
+    css_file = current_dir / "assets" / "style.css"
+    
+    if not css_file.exists():
+        return None
+    with open(css_file, "r", encoding="utf-8") as f:
+        return f.read()
+
 def load_css():
     """Load custom CSS styling"""
-    css_file = current_dir / "assets" / "style.css"
+    css_content = _read_css()
     
-    if css_file.exists():
-        with open(css_file, "r", encoding="utf-8") as f:
-            css_content = f.read()
-        
+    if css_content is not None:
         st.markdown(f"<style>{css_content}</style>", unsafe_allow_html=True)
     else:
         st.warning("CSS file not found. Some styling may be missing.")
@@ -44,25 +74,17 @@ def configure_page():
         }
     )
 
-def render_header():
+def render_header(current_phase: str, language: str, messages: Mapping[str, str]):
     """Render application header with navigation"""
-    current_phase = SessionManager.get_current_phase()
-    
     # Skip header during language selection
     if current_phase == PHASE_LANGUAGE_SELECTION:
         return
     
-    language = SessionManager.get_language()
-    messages = MESSAGES[language]
-    
     # Main title
     col1, col2, col3 = st.columns([3, 1, 1])
     
     with col1:
-        if language == "he":
-            st.title("🏥 מערכת הבריאות החכמה")
-        else:
-            st.title("🏥 Smart Health System")
+        st.title(messages["app_title"])
     
     with col2:
         # Language toggle
@@ -78,124 +100,100 @@ def render_header():
                 SessionManager.toggle_debug_mode()
                 st.rerun()
 
-def render_phase_indicator():
+def render_phase_indicator(current_phase: str, language: str):
     """Render current phase indicator"""
-    current_phase = SessionManager.get_current_phase()
-    
     # Skip phase indicator during language selection
     if current_phase == PHASE_LANGUAGE_SELECTION:
         return
     
-    language = SessionManager.get_language()
-    
     if current_phase == PHASE_COLLECTION:
-        if language == "he":
-            phase_text = "שלב 1: איסוף פרטי משתמש"
-            st.markdown(f'<div style="direction: rtl; text-align: right; background-color: #e1f5fe; color: #000000; padding: 10px; border-radius: 5px; border-left: 4px solid #01579b; margin-top: 10px;">{phase_text}</div>', unsafe_allow_html=True)
-        else:
-            phase_text = "Phase 1: User Profile Collection"
-            st.info(phase_text, icon="📝")
-    
+        key, icon = "phase_collection_banner", "📝"
     elif current_phase == PHASE_CHAT:
-        if language == "he":
-            phase_text = "💬 שלב 2: שאלות ותשובות רפואיות"
-            st.markdown(f'<div style="direction: rtl; text-align: right; background-color: #e1f5fe; color: #000000; padding: 10px; border-radius: 5px; border-left: 4px solid #01579b; margin-top: 10px;">{phase_text}</div>', unsafe_allow_html=True)
-        else:
-            phase_text = "Phase 2: Medical Q&A"
-            st.info(phase_text, icon="💬")
+        key, icon = "phase_chat_banner", "💬"
+    else:
+        return
+    
+    if language == "he":
+        st.markdown(_HE_BANNERS[key], unsafe_allow_html=True)
+    else:
+        st.info(MESSAGES_EN[key], icon=icon)
 
-def render_backend_status():
+def render_backend_status(current_phase: str, language: str, messages: Mapping[str, str]):
     """Render backend connection status"""
-    current_phase = SessionManager.get_current_phase()
-    
     # Skip backend status during language selection
     if current_phase == PHASE_LANGUAGE_SELECTION:
         return
     
     backend_status = SessionManager.get_backend_status()
-    language = SessionManager.get_language()
+    hebrew = language == "he"
     
     if backend_status is True:
-        if language == "he":
-            st.markdown('<div style="direction: rtl; text-align: right; background-color: #d4edda; color: #155724; padding: 12px; border-radius: 4px; border: 1px solid #c3e6cb;">🟢 ברוכים הבאים!</div>', unsafe_allow_html=True)
+        if hebrew:
+            st.markdown(_HE_BANNERS["backend_connected"], unsafe_allow_html=True)
         else:
-            st.success("Welcome!", icon="🟢")
+            st.success(MESSAGES_EN["backend_connected"], icon="🟢")
     
     elif backend_status is False:
-        if language == "he":
-            st.markdown('<div style="direction: rtl; text-align: right; background-color: #f8d7da; color: #721c24; padding: 12px; border-radius: 4px; border: 1px solid #f5c6cb;">🔴 שרת מנותק</div>', unsafe_allow_html=True)
+        if hebrew:
+            st.markdown(_HE_BANNERS["backend_disconnected"], unsafe_allow_html=True)
         else:
-            st.error("🔴 Backend Disconnected", icon="🔴")
+            st.error(MESSAGES_EN["backend_disconnected"], icon="🔴")
         
         # Show reconnect button
-        reconnect_text = "נסה להתחבר שוב" if language == "he" else "Try to Reconnect"
-        if st.button(reconnect_text):
+        if st.button(messages["reconnect"]):
             from components.api_client import test_backend_connection
-            test_backend_connection()
+            test_backend_connection(force=True)
             st.rerun()
     
     else:
-        if language == "he":
-            st.markdown('<div style="direction: rtl; text-align: right; background-color: #fff3cd; color: #856404; padding: 12px; border-radius: 4px; border: 1px solid #ffeaa7; margin-bottom: 15px;">🟡נא להמתין כבר מתחילים...</div>', unsafe_allow_html=True)
+        if hebrew:
+            st.markdown(_HE_BANNERS["backend_pending"], unsafe_allow_html=True)
         else:
-            st.warning("Getting Started...", icon="🟡")
+            st.warning(MESSAGES_EN["backend_pending"], icon="🟡")
 
-def render_navigation():
+def render_navigation(current_phase: str, messages: Mapping[str, str]):
     """Render navigation controls"""
-    current_phase = SessionManager.get_current_phase()
-    language = SessionManager.get_language()
-    
     if current_phase == PHASE_CHAT:
         # Show option to go back to profile
-        if language == "he":
-            back_text = "🔙 חזור לעריכת פרופיל"
-        else:
-            back_text = "🔙 Back to Profile"
-        
-        if st.button(back_text, key="nav_back_to_profile"):
+        if st.button(messages["nav_back"], key="nav_back_to_profile"):
             SessionManager.set_phase(PHASE_COLLECTION)
             st.rerun()
 
-def render_footer():
+def render_footer(messages: Mapping[str, str]):
     """Render application footer"""
-    language = SessionManager.get_language()
-    
     st.divider()
     
-    col1, col2, col3 = st.columns(3)
+    # The third column only holds debug info; without it the reset button's
+    # column spans the remaining two thirds, so it stays where it was
+    debug = SessionManager.get_debug_mode()
+    if debug:
+        col1, col2, col3 = st.columns(3)
+    else:
+        col1, col2 = st.columns([1, 2])
     
     with col1:
-        if language == "he":
-            st.caption("מערכת הבריאות החכמה")
-        else:
-            st.caption("Smart Health System")
+        st.caption(messages["footer_caption"])
     
     with col2:
         # Session controls
-        if language == "he":
-            reset_text = "🔄 איפוס מערכת"
-        else:
-            reset_text = "🔄 Reset System"
-        
-        if st.button(reset_text, key="footer_reset"):
+        if st.button(messages["footer_reset"], key="footer_reset"):
             # Use session state to track confirmation step
             if "confirm_reset" not in st.session_state:
                 st.session_state.confirm_reset = False
             
             if not st.session_state.confirm_reset:
                 st.session_state.confirm_reset = True
-                st.warning("Are you sure you want to reset?" if language == "en" else "האם אתה בטוח שברצונך לאפס?")
+                st.warning(messages["reset_confirm"])
                 st.rerun()
             else:
                 SessionManager.reset_session()
                 st.session_state.confirm_reset = False
                 st.rerun()
     
-    with col3:
-        # Show session info in debug mode
-        if SessionManager.get_debug_mode():
-            session_data = SessionManager.export_session_data()
-            st.caption(f"Phase: {session_data['current_phase']}")
+    if debug:
+        with col3:
+            # Show session info in debug mode
+            st.caption(f"Phase: {SessionManager.get_current_phase()}")
 
 def main():
     """Main application function"""
@@ -205,24 +203,27 @@ def main():
     # Load CSS
     load_css()
     
-    # Initialize session
+    # Initialize session (the only call per run; every SessionManager accessor relies on it)
     SessionManager.initialize_session()
     
+    # Read once for the whole run; anything that changes them triggers a rerun
+    current_phase = SessionManager.get_current_phase()
+    language = SessionManager.get_language()
+    messages = MESSAGES[language]
+    
     # Render header
-    render_header()
+    render_header(current_phase, language, messages)
     
     # Show backend status
-    render_backend_status()
+    render_backend_status(current_phase, language, messages)
     
     # Show phase indicator
-    render_phase_indicator()
+    render_phase_indicator(current_phase, language)
     
     # Show navigation if needed
-    render_navigation()
+    render_navigation(current_phase, messages)
     
     # Main content area
-    current_phase = SessionManager.get_current_phase()
-    
     try:
         if current_phase == PHASE_LANGUAGE_SELECTION:
             # Language Selection Phase
@@ -230,12 +231,15 @@ def main():
             language_selector.render()
         
         elif current_phase == PHASE_COLLECTION:
-            # Profile Collection Phase
+            # Profile Collection Phase (imported on first use: a freshly started process
+            # skips loading a phase page until some session first reaches it)
+            from components.profile_collector import ProfileCollector
             profile_collector = ProfileCollector()
             profile_collector.render()
         
         elif current_phase == PHASE_CHAT:
             # Medical Q&A Chat Phase
+            from components.chat_interface import ChatInterface
             chat_interface = ChatInterface()
             chat_interface.render()
         
@@ -247,28 +251,18 @@ def main():
     
     except Exception as e:
         # Error handling
-        language = SessionManager.get_language()
-        
-        if language == "he":
-            st.error(f"שגיאה במערכת: {str(e)}")
-        else:
-            st.error(f"System Error: {str(e)}")
+        st.error(f"{messages['system_error']}: {str(e)}")
         
         if SessionManager.get_debug_mode():
             st.exception(e)
         
         # Offer to reset
-        if language == "he":
-            reset_text = "איפוס מערכת"
-        else:
-            reset_text = "Reset System"
-        
-        if st.button(reset_text, key="error_reset"):
+        if st.button(messages["error_reset"], key="error_reset"):
             SessionManager.reset_session()
             st.rerun()
     
     # Render footer
-    render_footer()
+    render_footer(messages)
 
 if __name__ == "__main__":
     main()
@@ -19,10 +19,17 @@ def test_backend_connection():
     print(f"Backend URL: {BACKEND_BASE_URL}")
     print()
     
+    # One keep-alive session, so the four checks share a connection
+    with requests.Session() as session:
+        return _run_checks(session)
+
+def _run_checks(session: requests.Session) -> bool:
+    """Run the connection checks in order; the health check gates the rest"""
+    
     # Test 1: Health Check
     print("1. Testing Health Check...")
     try:
-        response = requests.get(f"{BACKEND_BASE_URL}{ENDPOINTS['health']}", timeout=5)
+        response = session.get(f"{BACKEND_BASE_URL}{ENDPOINTS['health']}", timeout=2)
         if response.status_code == 200:
             data = response.json()
             print(f"   ✅ Health check successful")
@@ -43,7 +50,7 @@ def test_backend_connection():
     # Test 2: KB Stats
     print("\n2. Testing KB Stats...")
     try:
-        response = requests.get(f"{BACKEND_BASE_URL}{ENDPOINTS['kb_stats']}", timeout=5)
+        response = session.get(f"{BACKEND_BASE_URL}{ENDPOINTS['kb_stats']}", timeout=5)
         if response.status_code == 200:
             data = response.json()
             if "error" in data:
@@ -63,7 +70,7 @@ def test_backend_connection():
             "message": "Hi, I want to register",
             "user_profile": {}
         }
-        response = requests.post(
+        response = session.post(
             f"{BACKEND_BASE_URL}{ENDPOINTS['collect_user_info']}", 
             json=test_payload, 
             timeout=10
@@ -94,7 +101,7 @@ def test_backend_connection():
             },
             "history": []
         }
-        response = requests.post(
+        response = session.post(
             f"{BACKEND_BASE_URL}{ENDPOINTS['chat']}", 
             json=test_payload, 
             timeout=15
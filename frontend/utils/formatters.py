@@ -1,62 +1,45 @@
 """
 Text and UI formatting utilities
 """
-from typing import Dict, Any, List
+from functools import lru_cache
+from typing import Dict, Any, List, Tuple
 import re
+from config.settings import FIELD_LABELS, REQUIRED_FIELDS
+
+_HEBREW_RE = re.compile(r'[\u0590-\u05FF]')
+
+# Displayed profile fields, in display order (both languages share the order)
+_DISPLAY_FIELDS = (*REQUIRED_FIELDS, "phone_number", "email")
+
+# Gender value (either language) -> display value, per language
+_GENDER_DISPLAY = {
+    "he": {"Male": "זכר", "Female": "נקבה", "זכר": "זכר", "נקבה": "נקבה"},
+    "en": {"Male": "Male", "Female": "Female", "זכר": "Male", "נקבה": "Female"}
+}
 
 def format_profile_display(profile: Dict[str, Any], language: str = "he") -> str:
     """
     Format user profile for display
     """
-    if language == "he":
-        field_names = {
-            "first_name": "שם פרטי",
-            "last_name": "שם משפחה", 
-            "id_number": "תעודת זהות",
-            "gender": "מין",
-            "age": "גיל",
-            "hmo": "קופת חולים",
-            "hmo_card_number": "מספר כרטיס",
-            "membership_tier": "דרגת חברות",
-            "phone_number": "טלפון",
-            "email": "אימייל"
-        }
-    else:
-        field_names = {
-            "first_name": "First Name",
-            "last_name": "Last Name",
-            "id_number": "ID Number", 
-            "gender": "Gender",
-            "age": "Age",
-            "hmo": "HMO",
-            "hmo_card_number": "Card Number",
-            "membership_tier": "Membership Tier",
-            "phone_number": "Phone",
-            "email": "Email"
-        }
-    
-    # Gender value mapping
-    def map_gender_value(gender_value: str, target_language: str) -> str:
-        if not gender_value:
-            return gender_value
-        
-        gender_mapping = {
-            "Male": "זכר" if target_language == "he" else "Male",
-            "Female": "נקבה" if target_language == "he" else "Female",
-            "זכר": "זכר" if target_language == "he" else "Male",
-            "נקבה": "נקבה" if target_language == "he" else "Female"
-        }
-        return gender_mapping.get(gender_value, gender_value)
+    # The sidebar re-renders this on every rerun; the profile rarely changes in between.
+    # Keyed on just the displayed fields' values, in display order
+    values = tuple(profile.get(field) for field in _DISPLAY_FIELDS)
+    return _format_profile_values(values, "he" if language == "he" else "en")
+
+@lru_cache(maxsize=64)
+def _format_profile_values(values: Tuple[Any, ...], language: str) -> str:
+    gender_display = _GENDER_DISPLAY[language]
     
     formatted_lines = []
-    for field, value in profile.items():
-        if value and field in field_names:
-            # Apply gender mapping if it's the gender field
-            display_value = value
-            if field == "gender":
-                display_value = map_gender_value(value, language)
-            
-            formatted_lines.append(f"**{field_names[field]}:** {display_value}")
+    labels = FIELD_LABELS[language]
+    for field, value in zip(_DISPLAY_FIELDS, values):
+        if not value:
+            continue
+        # Apply gender mapping if it's the gender field
+        if field == "gender":
+            value = gender_display.get(value, value)
+        
+        formatted_lines.append(f"**{labels[field]}:** {value}")
     
     return "\n".join(formatted_lines)
 
@@ -64,22 +47,25 @@ def format_progress_percentage(profile: Dict[str, Any]) -> int:
     """
     Calculate profile completion percentage
     """
-    from config.settings import REQUIRED_FIELDS
+    from config.settings import REQUIRED_FIELDS, REQUIRED_FIELDS_COUNT
     
-    completed_required = sum(1 for field in REQUIRED_FIELDS if profile.get(field))
-    return int((completed_required / len(REQUIRED_FIELDS)) * 100)
+    completed_required = 0
+    for field in REQUIRED_FIELDS:
+        if profile.get(field):
+            completed_required += 1
+    return completed_required * 100 // REQUIRED_FIELDS_COUNT
 
 def format_field_status(field_name: str, profile: Dict[str, Any]) -> str:
     """
     Get field completion status for UI display
     """
-    from config.settings import REQUIRED_FIELDS
+    from config.settings import REQUIRED_FIELDS_SET
     
     value = profile.get(field_name)
     
     if value:
         return "✅"  # Completed
-    elif field_name in REQUIRED_FIELDS:
+    elif field_name in REQUIRED_FIELDS_SET:
         return "❌"  # Required but missing
     else:
         return "⭕"  # Optional
@@ -106,8 +92,7 @@ def contains_hebrew(text: str) -> bool:
     """
     Check if text contains Hebrew characters
     """
-    hebrew_pattern = r'[\u0590-\u05FF]'
-    return bool(re.search(hebrew_pattern, text))
+    return _HEBREW_RE.search(text) is not None
 
 def format_validation_errors(errors: List[str], language: str = "he") -> str:
     """
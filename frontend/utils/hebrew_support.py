@@ -2,15 +2,41 @@
 RTL/Hebrew display helpers
 """
 import re
-from typing import Dict, Any
+from types import MappingProxyType
+from typing import Mapping
+from config.settings import FIELD_LABELS_HE
+
+# Hebrew, Arabic, or other RTL characters
+_RTL_RE = re.compile(r'[\u0590-\u05FF\u0600-\u06FF\u0750-\u077F]')
+
+# A sentence and the terminator (plus whitespace) ending it; a terminator
+# not followed by whitespace, as in "3.5", stays inside the sentence
+_SENTENCE_RE = re.compile(r'(.*?)([.!?]\s+|[.!?]?$)', re.S)
+
+_HEBREW_FONT_STACK = "'Segoe UI', 'Arial Hebrew', 'Noto Sans Hebrew', Arial, sans-serif"
+
+# Read-only: one mapping is returned to every caller
+_HEBREW_STYLE = MappingProxyType({
+    "direction": "rtl",
+    "text-align": "right",
+    "font-family": _HEBREW_FONT_STACK,
+    "line-height": "1.6"
+})
+
+# Chat bubble: (css class, text-align, direction, message)
+_BUBBLE_TEMPLATE = '<div class="{0}" style="text-align: {1}; direction: {2};">{3}</div>'
 
 def is_rtl_text(text: str) -> bool:
     """
     Determine if text should be displayed RTL
     """
-    # Check for Hebrew, Arabic, or other RTL characters
-    rtl_pattern = r'[\u0590-\u05FF\u0600-\u06FF\u0750-\u077F]'
-    return bool(re.search(rtl_pattern, text))
+    # ASCII text (the English UI, most profile values) can't be RTL;
+    # str.isascii reads a flag CPython keeps on the string
+    if text.isascii():
+        return False
+    # Not memoized: streamed answers pass a new, longer string per token, and the
+    # search stops at the first RTL character anyway
+    return _RTL_RE.search(text) is not None
 
 def wrap_rtl_content(content: str, css_class: str = "rtl-text") -> str:
     """
@@ -30,56 +56,41 @@ def format_mixed_text(text: str) -> str:
     """
     Handle mixed Hebrew/English text with proper direction
     """
-    # Split by sentences and apply direction per sentence
-    sentences = re.split(r'[.!?]\s+', text)
+    # One pass over the sentences, keeping each one's own terminator
     formatted_sentences = []
     
-    for sentence in sentences:
-        if sentence.strip():
-            direction = get_text_direction(sentence)
+    for match in _SENTENCE_RE.finditer(text):
+        sentence = match.group(1).strip()
+        if sentence:
+            direction = "rtl" if _RTL_RE.search(sentence) else "ltr"
             formatted_sentences.append(
-                f'<span dir="{direction}">{sentence.strip()}</span>'
+                f'<span dir="{direction}">{sentence}</span>{match.group(2).strip()}'
             )
     
-    return '. '.join(formatted_sentences)
+    return ' '.join(formatted_sentences)
 
 def get_hebrew_font_stack() -> str:
     """
     Get CSS font stack optimized for Hebrew
     """
-    return "'Segoe UI', 'Arial Hebrew', 'Noto Sans Hebrew', Arial, sans-serif"
+    return _HEBREW_FONT_STACK
 
-def apply_hebrew_styling(element_type: str = "div") -> Dict[str, str]:
+def apply_hebrew_styling(element_type: str = "div") -> Mapping[str, str]:
     """
-    Get CSS properties for Hebrew text elements
+    Get CSS properties for Hebrew text elements (shared and read-only)
     """
-    return {
-        "direction": "rtl",
-        "text-align": "right",
-        "font-family": get_hebrew_font_stack(),
-        "line-height": "1.6"
-    }
+    return _HEBREW_STYLE
 
 def format_profile_field_hebrew(field_name: str, value: str) -> str:
     """
     Format profile field with proper Hebrew alignment
     """
-    hebrew_field_names = {
-        "first_name": "שם פרטי",
-        "last_name": "שם משפחה",
-        "id_number": "תעודת זהות", 
-        "gender": "מין",
-        "age": "גיל",
-        "hmo": "קופת חולים",
-        "hmo_card_number": "מספר כרטיס",
-        "membership_tier": "דרגת חברות",
-        "phone_number": "טלפון",
-        "email": "אימייל",
-        "address": "כתובת",
-        "emergency_contact": "איש קשר לחירום"
-    }
+    hebrew_name = FIELD_LABELS_HE.get(field_name, field_name)
     
-    hebrew_name = hebrew_field_names.get(field_name, field_name)
+    # The row stays RTL (the label is Hebrew); LTR values such as emails and
+    # phone numbers are isolated so their characters keep their order
+    if not is_rtl_text(str(value)):
+        value = f'<span dir="ltr">{value}</span>'
     
     # Format with RTL alignment
     return f'<div class="rtl-text"><strong>{hebrew_name}:</strong> {value}</div>'
@@ -94,13 +105,10 @@ def format_chat_bubble_rtl(message: str, is_user: bool = False) -> str:
     """
     Format chat message with proper RTL support
     """
-    direction = get_text_direction(message)
-    alignment = "right" if direction == "rtl" else "left"
+    rtl = is_rtl_text(message)
+    direction = "rtl" if rtl else "ltr"
+    alignment = "right" if rtl else "left"
     
     bubble_class = "user-message" if is_user else "bot-message"
     
-    return f'''
-    <div class="{bubble_class}" style="text-align: {alignment}; direction: {direction};">
-        {message}
-    </div>
-    '''
+    return _BUBBLE_TEMPLATE.format(bubble_class, alignment, direction, message)
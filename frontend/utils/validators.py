@@ -3,26 +3,32 @@ Frontend validation helpers
 """
 import re
 from typing import Dict, Any, List, Tuple
+from config.settings import REQUIRED_FIELDS
+
+# Israeli mobile: 05X-XXXXXXX or landline: 0X-XXXXXXX
+_PHONE_RE = re.compile(r'^0[2-9]\d{7,8}$', re.ASCII)
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+# Israeli ID check digit: digit -> digit sum of twice the digit
+_DOUBLED_DIGIT_SUM = (0, 2, 4, 6, 8, 1, 3, 5, 7, 9)
 
 def validate_israeli_id(id_number: str) -> Tuple[bool, str]:
     """
     Validate Israeli ID number using check digit algorithm
     """
-    if not id_number or not id_number.isdigit():
+    # ASCII only: str.isdigit also accepts other scripts' digits
+    if not id_number or not (id_number.isascii() and id_number.isdigit()):
         return False, "ID must contain only digits"
     
     if len(id_number) != 9:
         return False, "ID must be exactly 9 digits"
     
-    # Israeli ID check digit algorithm
+    # Israeli ID check digit algorithm, on the digits' byte values
     total = 0
-    for i, digit in enumerate(id_number):
-        num = int(digit)
-        if i % 2 == 1:  # Even position (0-indexed)
-            num *= 2
-            if num > 9:
-                num = num // 10 + num % 10
-        total += num
+    for i, code in enumerate(id_number.encode("ascii")):
+        digit = code - 0x30
+        # Even position (0-indexed odd): doubled, digits summed
+        total += _DOUBLED_DIGIT_SUM[digit] if i & 1 else digit
     
     if total % 10 != 0:
         return False, "Invalid Israeli ID number"
@@ -36,11 +42,11 @@ def validate_phone_number(phone: str) -> Tuple[bool, str]:
     if not phone:
         return True, ""  # Optional field
     
-    # Remove spaces and dashes
-    clean_phone = re.sub(r'[\s-]', '', phone)
+    # Remove spaces and dashes (split() splits on the same whitespace as \s)
+    clean_phone = "".join(phone.split()).replace("-", "")
     
     # Israeli mobile: 05X-XXXXXXX or landline: 0X-XXXXXXX
-    if not re.match(r'^0[2-9]\d{7,8}$', clean_phone):
+    if not _PHONE_RE.match(clean_phone):
         return False, "Invalid phone number format"
     
     return True, ""
@@ -52,8 +58,7 @@ def validate_email(email: str) -> Tuple[bool, str]:
     if not email:
         return True, ""  # Optional field
     
-    email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    if not re.match(email_pattern, email):
+    if not _EMAIL_RE.match(email):
         return False, "Invalid email format"
     
     return True, ""
@@ -62,13 +67,17 @@ def validate_age(age_str: str) -> Tuple[bool, str]:
     """
     Validate age input
     """
-    try:
-        age = int(age_str)
-        if age < 0 or age > 150:
-            return False, "Age must be between 0 and 150"
-        return True, ""
-    except ValueError:
+    # Checked up front rather than by catching int()'s ValueError; a sign is
+    # still accepted so negative ages get the range message
+    age_str = age_str.strip()
+    digits = age_str[1:] if age_str[:1] in ("+", "-") else age_str
+    if not (digits.isascii() and digits.isdigit()):
         return False, "Age must be a number"
+    
+    age = int(age_str)
+    if age < 0 or age > 150:
+        return False, "Age must be between 0 and 150"
+    return True, ""
 
 def validate_hmo_card_number(card_number: str) -> Tuple[bool, str]:
     """
@@ -77,12 +86,21 @@ def validate_hmo_card_number(card_number: str) -> Tuple[bool, str]:
     if not card_number:
         return False, "HMO card number is required"
     
-    # Basic validation - should be numeric and reasonable length
-    if not card_number.isdigit() or len(card_number) < 6 or len(card_number) > 12:
+    # Basic validation - should be ASCII digits and reasonable length
+    if not (6 <= len(card_number) <= 12 and card_number.isascii() and card_number.isdigit()):
         return False, "HMO card number should be 6-12 digits"
     
     return True, ""
 
+# Field-specific validators, looked up by validate_profile_field
+_FIELD_VALIDATORS = {
+    "id_number": validate_israeli_id,
+    "phone_number": validate_phone_number,
+    "email": validate_email,
+    "age": validate_age,
+    "hmo_card_number": validate_hmo_card_number
+}
+
 def validate_profile_field(field_name: str, value: str) -> Tuple[bool, str]:
     """
     Validate individual profile field
@@ -90,16 +108,9 @@ def validate_profile_field(field_name: str, value: str) -> Tuple[bool, str]:
     if not value and field_name in ["first_name", "last_name", "gender", "hmo"]:
         return False, f"{field_name} is required"
     
-    validators = {
-        "id_number": validate_israeli_id,
-        "phone_number": validate_phone_number,
-        "email": validate_email,
-        "age": validate_age,
-        "hmo_card_number": validate_hmo_card_number
-    }
-    
-    if field_name in validators:
-        return validators[field_name](value)
+    validator = _FIELD_VALIDATORS.get(field_name)
+    if validator:
+        return validator(value)
     
     # Default validation for text fields
     if field_name in ["first_name", "last_name"] and value:
@@ -108,30 +119,32 @@ def validate_profile_field(field_name: str, value: str) -> Tuple[bool, str]:
     
     return True, ""
 
+# Optional fields that are checked when filled in
+_VALIDATED_OPTIONAL_FIELDS = ("phone_number", "email")
+
 def validate_complete_profile(profile: Dict[str, Any]) -> Tuple[bool, List[str]]:
     """
     Validate complete user profile
     """
     errors = []
     
-    from config.settings import REQUIRED_FIELDS
-    
     # Check required fields
     for field in REQUIRED_FIELDS:
-        if field not in profile or not profile[field]:
+        value = profile.get(field)
+        if not value:
             errors.append(f"Missing required field: {field}")
             continue
         
-        is_valid, error_msg = validate_profile_field(field, str(profile[field]))
+        is_valid, error_msg = validate_profile_field(field, value if isinstance(value, str) else str(value))
         if not is_valid:
             errors.append(f"{field}: {error_msg}")
     
     # Validate optional fields if present
-    optional_fields = ["phone_number", "email"]
-    for field in optional_fields:
-        if field in profile and profile[field]:
-            is_valid, error_msg = validate_profile_field(field, str(profile[field]))
+    for field in _VALIDATED_OPTIONAL_FIELDS:
+        value = profile.get(field)
+        if value:
+            is_valid, error_msg = validate_profile_field(field, value if isinstance(value, str) else str(value))
             if not is_valid:
                 errors.append(f"{field}: {error_msg}")
     
-    return len(errors) == 0, errors
+    return not errors, errors